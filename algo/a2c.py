@@ -4,7 +4,6 @@ import click
 import gym
 import gym.wrappers
 import numpy as np
-import pybulletgym
 import torch
 import torch.nn as nn
 import torch.optim
@@ -15,13 +14,14 @@ from tensorboardX import SummaryWriter
 from tqdm import tqdm
 
 import wrappers
-from algo.common import build_optimizer, build_env
-from history import History
+from algo import distributed
+from algo.collector import Collector, PipelinedCollector
+from algo.common import build_optimizer, build_env, StartupReport, import_plugins
 from model import Model
+from transforms import apply_batch_transforms
 from utils import n_step_discounted_return
 from vec_env import VecEnv
 
-pybulletgym
 
 DEVICE = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
 
@@ -45,23 +45,37 @@ def main(config_path, **kwargs):
         **kwargs)
     del config_path, kwargs
 
-    writer = SummaryWriter(config.experiment_path)
+    distributed.launch(train, config)
 
-    seed_torch(config.seed)
+
+def train(rank, config):
+    distributed.init(rank, config)
+
+    writer = SummaryWriter(config.experiment_path) if distributed.is_master() else None
+    startup = StartupReport()
+
+    import_plugins(config)
+    startup.record('plugin')
+
+    seed_torch(config.seed + rank)
     env = VecEnv([
         lambda: build_env(config)
         for _ in range(config.workers)])
-    if config.render:
+    if config.render and distributed.is_master():
         env = wrappers.TensorboardBatchMonitor(env, writer, config.log_interval)
-    env = wrappers.Torch(env, dtype=torch.float, device=DEVICE)
-    env.seed(config.seed)
+    env = wrappers.Torch(env, device=DEVICE)
+    env = apply_batch_transforms(env, config.transforms)
+    env.seed(config.seed + rank * config.workers)
+    startup.record('env')
 
     model = Model(config.model, env.observation_space, env.action_space)
     model = model.to(DEVICE)
     if config.restore_path is not None:
         model.load_state_dict(torch.load(config.restore_path))
+    distributed.broadcast_state(model)
     optimizer = build_optimizer(config.opt, model.parameters())
     scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, config.episodes)
+    startup.record('model')
 
     metrics = {
         'loss': Mean(),
@@ -77,46 +91,28 @@ def main(config_path, **kwargs):
     model.train()
     episode = 0
     s = env.reset()
-
-    bar = tqdm(total=config.episodes, desc='training')
+    startup.record('reset')
+    if distributed.is_master():
+        print(startup)
+    h = model.zero_state(config.workers)
+    d = torch.ones(config.workers, dtype=torch.bool)
+
+    if config.get('pipeline', False):
+        # next rollout is collected with previous weights while learner trains on current one
+        collector = PipelinedCollector(env, model, config.horizon, (s, h, d))
+    else:
+        collector = Collector(env, model, config.horizon, (s, h, d))
+
+    bar = tqdm(total=config.episodes, desc='training', disable=not distributed.is_master())
     while episode < config.episodes:
-        history = History()
-
-        with torch.no_grad():
-            for _ in range(config.horizon):
-                a, _ = model(s)
-                a = a.sample()
-                s_prime, r, d, info = env.step(a)
-                history.append(state=s, action=a, reward=r, done=d, state_prime=s_prime)
-                s = s_prime
-
-                indices, = torch.where(d)
-                for i in indices:
-                    metrics['eps'].update(1)
-                    metrics['ep/length'].update(info[i]['episode']['l'])
-                    metrics['ep/return'].update(info[i]['episode']['r'])
-                    episode += 1
-                    scheduler.step()
-                    bar.update(1)
-
-                    if episode % config.log_interval == 0 and episode > 0:
-                        for k in metrics:
-                            writer.add_scalar(k, metrics[k].compute_and_reset(), global_step=episode)
-                        writer.add_histogram('rollout/action', rollout.actions, global_step=episode)
-                        writer.add_histogram('rollout/reward', rollout.rewards, global_step=episode)
-                        writer.add_histogram('rollout/return', returns, global_step=episode)
-                        writer.add_histogram('rollout/value', values, global_step=episode)
-                        writer.add_histogram('rollout/advantage', advantages, global_step=episode)
-
-                        torch.save(
-                            model.state_dict(),
-                            os.path.join(config.experiment_path, 'model_{}.pth'.format(episode)))
-
-        rollout = history.full_rollout()
-        dist, values = model(rollout.states)
-        with torch.no_grad():
-            _, value_prime = model(rollout.states_prime[:, -1])
-            returns = n_step_discounted_return(rollout.rewards, value_prime, rollout.dones, gamma=config.gamma)
+        rollout, s, episodes = collector.next()
+
+        last_episode = episode
+        episode = distributed.count_episodes(episodes, episode, metrics, scheduler, bar)
+
+        dist, values, value_prime = model.evaluate_rollout(
+            rollout.state, s, rollout.hidden[:, 0], rollout.done, rollout.done_prime)
+        returns = n_step_discounted_return(rollout.reward, value_prime, rollout.done_prime, gamma=config.gamma)
 
         # critic
         errors = returns - values
@@ -124,7 +120,7 @@ def main(config_path, **kwargs):
 
         # actor
         advantages = errors.detach()
-        log_prob = dist.log_prob(rollout.actions)
+        log_prob = dist.log_prob(rollout.action)
         entropy = dist.entropy()
 
         if isinstance(env.action_space, gym.spaces.Box):
@@ -139,17 +135,35 @@ def main(config_path, **kwargs):
         loss = (actor_loss + 0.5 * critic_loss).mean(1)
 
         metrics['loss'].update(loss.data.cpu().numpy())
-        metrics['lr'].update(np.squeeze(scheduler.get_lr()))
-        metrics['rollout/entropy'].update(dist.entropy().data.cpu().numpy())
+        metrics['lr'].update(np.squeeze(scheduler.get_last_lr()))
+        metrics['rollout/entropy'].update(entropy.data.cpu().numpy())
 
         # training
         optimizer.zero_grad()
         loss.mean().backward()
+        distributed.all_reduce_grads(model.parameters())
         nn.utils.clip_grad_norm_(model.parameters(), 0.5)
         optimizer.step()
+        distributed.broadcast_buffers(model)
+        collector.update(model)
+
+        if episode // config.log_interval > last_episode // config.log_interval and distributed.is_master():
+            for k in metrics:
+                writer.add_scalar(k, metrics[k].compute_and_reset(), global_step=episode)
+            writer.add_histogram('rollout/action', rollout.action, global_step=episode)
+            writer.add_histogram('rollout/reward', rollout.reward, global_step=episode)
+            writer.add_histogram('rollout/return', returns.detach(), global_step=episode)
+            writer.add_histogram('rollout/value', values.detach(), global_step=episode)
+            writer.add_histogram('rollout/advantage', advantages, global_step=episode)
+
+            torch.save(
+                model.state_dict(),
+                os.path.join(config.experiment_path, 'model_{}.pth'.format(episode)))
 
     bar.close()
+    collector.close()
     env.close()
+    distributed.cleanup()
 
 
 if __name__ == '__main__':
@@ -3,9 +3,7 @@ import os
 import click
 import gym
 import gym.wrappers
-import gym_minigrid
 import numpy as np
-import pybulletgym
 import torch
 import torch.nn as nn
 import torch.optim
@@ -17,13 +15,14 @@ from tqdm import tqdm
 
 import utils
 import wrappers
-from algo.common import build_optimizer, build_env
+from algo import distributed
+from algo.common import build_optimizer, build_env, build_actor, StartupReport, import_plugins
 from history import History
 from model import Model
+from model.quantize import policy_drift
+from transforms import apply_batch_transforms
 from vec_env import VecEnv
 
-pybulletgym
-gym_minigrid
 
 DEVICE = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
 
@@ -46,29 +45,60 @@ def main(config_path, **kwargs):
         **kwargs)
     del config_path, kwargs
 
-    if config.adv_norm:
+    distributed.launch(train, config)
+
+
+def train(rank, config):
+    distributed.init(rank, config)
+
+    if config.adv_norm and distributed.is_master():
         print(
             'warning: you are using advantage normalization with batch size of {} ({} * {}), '
             'please make sure to use sufficiently large batch size when estimating advantage normalization statistics'
                 .format(config.workers * config.horizon, config.workers, config.horizon))
 
-    writer = SummaryWriter(config.experiment_path)
+    micro_batches = config.get('micro_batches', 1)
+    if config.adv_norm and micro_batches > 1 and distributed.is_master():
+        print(
+            'warning: you are using advantage normalization with {} micro-batches, '
+            'normalization statistics are estimated separately for each micro-batch of {} envs'
+                .format(micro_batches, config.workers // micro_batches))
+    # batch renorm running statistics are likewise updated once per micro-batch. with config.model.encoder.checkpoint
+    # they are still updated once per forward, Model.checkpointed_encoder rolls them back around the recompute
+
+    writer = SummaryWriter(config.experiment_path) if distributed.is_master() else None
+    startup = StartupReport()
 
-    seed_torch(config.seed)
+    import_plugins(config)
+    startup.record('plugin')
+
+    seed_torch(config.seed + rank)
     env = VecEnv([
         lambda: build_env(config)
         for _ in range(config.workers)])
-    if config.render:
+    if config.render and distributed.is_master():
         env = wrappers.TensorboardBatchMonitor(env, writer, config.log_interval)
     env = wrappers.Torch(env, device=DEVICE)
-    env.seed(config.seed)
+    env = apply_batch_transforms(env, config.transforms)
+    env.seed(config.seed + rank * config.workers)
+    startup.record('env')
 
     model = Model(config.model, env.observation_space, env.action_space)
     model = model.to(DEVICE)
     if config.restore_path is not None:
         model.load_state_dict(torch.load(config.restore_path))
-    optimizer = build_optimizer(config.opt, model.parameters())
+    distributed.broadcast_state(model)
+    # compiled learner step: compiled loss, multi-tensor (foreach) optimizer update and gradient clipping,
+    # only supported by this script, a2c.py ignores config.compile
+    use_compile = config.get('compile', False)
+    optimizer = build_optimizer(config.opt, model.parameters(), foreach=True if use_compile else None)
+    loss_fn = torch.compile(compute_loss) if use_compile else compute_loss
+    box = isinstance(env.action_space, gym.spaces.Box)
     scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, config.episodes)
+    if config.get('quantize_actor', False):
+        assert DEVICE.type == 'cpu', 'dynamic quantization is only supported on cpu'
+    actor = build_actor(model, config)
+    startup.record('model')
 
     metrics = {
         'loss': Mean(),
@@ -81,17 +111,23 @@ def main(config_path, **kwargs):
         'rollout/advantage': Mean(),
         'rollout/entropy': Mean(),
     }
+    if actor is not model:
+        metrics['actor/kl'] = Mean()
 
     # training loop ====================================================================================================
     episode = 0
 
     s = env.reset()
+    startup.record('reset')
+    if distributed.is_master():
+        print(startup)
     h = model.zero_state(config.workers)
     d = torch.ones(config.workers, dtype=torch.bool)
 
-    bar = tqdm(total=config.episodes, desc='training')
+    bar = tqdm(total=config.episodes, desc='training', disable=not distributed.is_master())
     while episode < config.episodes:
         hist = History()
+        episodes = []
 
         model.eval()
         with torch.no_grad():
@@ -99,26 +135,16 @@ def main(config_path, **kwargs):
                 trans = hist.append_transition()
 
                 trans.record(state=s, hidden=h, done=d)
-                a, _, h = model(s, h, d)
-                a = a.sample()
+                a, _, h = actor.act(s, h, d)
                 s, r, d, info = env.step(a)
-                trans.record(action=a, reward=r, state_prime=s, hidden_prime=h, done_prime=d)
+                trans.record(action=a, reward=r, done_prime=d)
 
                 indices, = torch.where(d)
                 for i in indices:
-                    metrics['eps'].update(1)
-                    metrics['ep/length'].update(info[i]['episode']['l'])
-                    metrics['ep/return'].update(info[i]['episode']['r'])
-                    episode += 1
-                    scheduler.step()
-                    bar.update(1)
-
-                    if episode % config.log_interval == 0 and episode > 0:
-                        for k in metrics:
-                            writer.add_scalar(k, metrics[k].compute_and_reset(), global_step=episode)
-                        torch.save(
-                            model.state_dict(),
-                            os.path.join(config.experiment_path, 'model_{}.pth'.format(episode)))
+                    episodes.append((info[i]['episode']['l'], info[i]['episode']['r']))
+
+        last_episode = episode
+        episode = distributed.count_episodes(episodes, episode, metrics, scheduler, bar)
 
         # optimization =================================================================================================
         model.train()
@@ -126,29 +152,60 @@ def main(config_path, **kwargs):
         # build rollout
         rollout = hist.full_rollout()
 
-        # loss
-        loss = compute_loss(env, model, rollout, metrics, config)
-
         # metrics
-        metrics['loss'].update(loss.data.cpu().numpy())
         metrics['lr'].update(np.squeeze(scheduler.get_last_lr()))
+        if actor is not model:
+            kl = policy_drift(model, actor, env.action_space, rollout.state, rollout.hidden[:, 0], rollout.done)
+            metrics['actor/kl'].update(kl.data.cpu().numpy())
 
         # training
         optimizer.zero_grad()
-        loss.mean().backward()
+        # gradients are accumulated over micro-batches of envs, each scaled to its share of full batch mean
+        for rollout_chunk, s_chunk in zip(rollout.split(micro_batches), torch.chunk(s, micro_batches, 0)):
+            loss, stats = loss_fn(
+                model,
+                rollout_chunk.state,
+                s_chunk,
+                rollout_chunk.hidden[:, 0],
+                rollout_chunk.done,
+                rollout_chunk.done_prime,
+                rollout_chunk.action,
+                rollout_chunk.reward,
+                gamma=config.gamma,
+                entropy_weight=config.entropy_weight,
+                adv_norm=config.adv_norm,
+                box=box)
+            (loss.sum() / config.workers).backward()
+
+            for k in stats:
+                metrics[k].update(stats[k].data.cpu().numpy())
+            metrics['loss'].update(loss.data.cpu().numpy())
+
+        distributed.all_reduce_grads(model.parameters())
         if config.grad_clip_norm is not None:
-            nn.utils.clip_grad_norm_(model.parameters(), config.grad_clip_norm)
+            nn.utils.clip_grad_norm_(model.parameters(), config.grad_clip_norm, foreach=True if use_compile else None)
         optimizer.step()
+        distributed.broadcast_buffers(model)
+        if actor is not model:
+            actor = build_actor(model, config)
+
+        if episode // config.log_interval > last_episode // config.log_interval and distributed.is_master():
+            for k in metrics:
+                writer.add_scalar(k, metrics[k].compute_and_reset(), global_step=episode)
+            torch.save(
+                model.state_dict(),
+                os.path.join(config.experiment_path, 'model_{}.pth'.format(episode)))
 
     bar.close()
     env.close()
+    distributed.cleanup()
 
 
-def compute_loss(env, model, rollout, metrics, config):
-    dist, values, hidden = model(rollout.state, rollout.hidden[:, 0], rollout.done)
-    with torch.no_grad():
-        _, value_prime, _ = model(rollout.state_prime[:, -1], hidden, rollout.done_prime[:, -1])
-        returns = utils.n_step_discounted_return(rollout.reward, value_prime, rollout.done_prime, gamma=config.gamma)
+def compute_loss(
+        model, state, state_prime, hidden, done, done_prime, action, reward, gamma, entropy_weight, adv_norm, box):
+    # takes only tensors and flags, so compiled graph does not depend on rollout or env objects
+    dist, values, value_prime = model.evaluate_rollout(state, state_prime, hidden, done, done_prime)
+    returns = utils.n_step_discounted_return(reward, value_prime, done_prime, gamma=gamma)
 
     # critic
     errors = returns - values
@@ -156,29 +213,31 @@ def compute_loss(env, model, rollout, metrics, config):
 
     # actor
     advantages = errors.detach()
-    if config.adv_norm:
+    if adv_norm:
         advantages = utils.normalize(advantages)
 
-    log_prob = dist.log_prob(rollout.action)
+    log_prob = dist.log_prob(action)
     entropy = dist.entropy()
 
-    if isinstance(env.action_space, gym.spaces.Box):
+    if box:
         log_prob = log_prob.sum(-1)
         entropy = entropy.sum(-1)
 
     actor_loss = -log_prob * advantages + \
-                 config.entropy_weight * -entropy
+                 entropy_weight * -entropy
 
     # loss
     loss = (actor_loss + 0.5 * critic_loss).mean(1)
 
-    # metrics
-    metrics['rollout/reward'].update(rollout.reward.data.cpu().numpy())
-    metrics['rollout/value'].update(values.data.cpu().numpy())
-    metrics['rollout/advantage'].update(advantages.data.cpu().numpy())
-    metrics['rollout/entropy'].update(entropy.data.cpu().numpy())
+    # metrics are returned as tensors and moved to host by caller, so loss computation has no device syncs
+    stats = {
+        'rollout/reward': reward,
+        'rollout/value': values,
+        'rollout/advantage': advantages,
+        'rollout/entropy': entropy,
+    }
 
-    return loss
+    return loss, stats
 
 
 if __name__ == '__main__':
@@ -0,0 +1,216 @@
+import os
+import queue
+import time
+
+import click
+import gym
+import torch
+import torch.multiprocessing as mp
+import torch.nn as nn
+import torch.optim
+from all_the_tools.config import load_config
+from all_the_tools.metrics import Mean, FPS
+from all_the_tools.torch.utils import seed_torch
+from tensorboardX import SummaryWriter
+from tqdm import tqdm
+
+import wrappers
+from algo.a2c_rnn import compute_loss
+from algo.common import (
+    build_optimizer, build_env, share_optimizer_state, import_plugins, probe_spaces, drain_and_join)
+from history import History
+from model import Model
+from transforms import apply_batch_transforms
+
+
+@click.command()
+@click.option('--config-path', type=click.Path(), required=True)
+@click.option('--experiment-path', type=click.Path(), required=True)
+@click.option('--restore-path', type=click.Path())
+def main(config_path, **kwargs):
+    config = load_config(
+        config_path,
+        **kwargs)
+    del config_path, kwargs
+
+    writer = SummaryWriter(config.experiment_path)
+
+    import_plugins(config)
+
+    seed_torch(config.seed)
+    model, optimizer = build_shared_model(config)
+    if config.restore_path is not None:
+        model.load_state_dict(torch.load(config.restore_path))
+
+    stats = mp.Queue()
+    updates = mp.Value('l', 0)
+    stop = mp.Event()
+    processes = start_workers(config, model, optimizer, stats, updates, stop)
+
+    metrics = {
+        'loss': Mean(),
+        'eps': FPS(),
+        'ups': FPS(),
+        'ep/length': Mean(),
+        'ep/return': Mean(),
+    }
+
+    # training loop ====================================================================================================
+    episode = 0
+    last_updates = 0
+
+    bar = tqdm(total=config.episodes, desc='training')
+    while episode < config.episodes:
+        try:
+            kind, *data = stats.get(timeout=1.)
+        except queue.Empty:
+            continue
+
+        if kind == 'loss':
+            loss, = data
+            metrics['loss'].update(loss)
+            continue
+
+        length, ret = data
+        metrics['eps'].update(1)
+        metrics['ep/length'].update(length)
+        metrics['ep/return'].update(ret)
+        metrics['ups'].update(updates.value - last_updates)
+        last_updates = updates.value
+        episode += 1
+        bar.update(1)
+
+        if episode % config.log_interval == 0 and episode > 0:
+            for k in metrics:
+                writer.add_scalar(k, metrics[k].compute_and_reset(), global_step=episode)
+            torch.save(
+                model.state_dict(),
+                os.path.join(config.experiment_path, 'model_{}.pth'.format(episode)))
+
+    bar.close()
+
+    stop.set()
+    drain_and_join(processes, stats)
+
+
+def build_shared_model(config):
+    model = Model(config.model, *probe_spaces(config))
+
+    # parameters and optimizer state live in shared memory and are updated by all workers without locking
+    model.share_memory()
+    optimizer = build_optimizer(config.opt, model.parameters())
+    share_optimizer_state(optimizer)
+
+    return model, optimizer
+
+
+def start_workers(config, model, optimizer, stats, updates, stop, processes=None):
+    processes = [
+        mp.Process(target=worker, args=(rank, config, model, optimizer, stats, updates, stop))
+        for rank in range(processes or config.processes)]
+    for process in processes:
+        process.start()
+
+    return processes
+
+
+def worker(rank, config, shared_model, optimizer, stats, updates, stop):
+    torch.set_num_threads(1)
+    seed_torch(config.seed + rank)
+
+    env = wrappers.Batch(build_env(config))
+    env = wrappers.Torch(env, device=torch.device('cpu'))
+    env = apply_batch_transforms(env, config.transforms)
+    env.seed(config.seed + rank)
+
+    model = Model(config.model, env.observation_space, env.action_space)
+
+    s = env.reset()
+    h = model.zero_state(1)
+    d = torch.ones(1, dtype=torch.bool)
+
+    while not stop.is_set():
+        model.load_state_dict(shared_model.state_dict())
+        hist = History()
+
+        model.eval()
+        with torch.no_grad():
+            for _ in range(config.horizon):
+                trans = hist.append_transition()
+
+                trans.record(state=s, hidden=h, done=d)
+                a, _, h = model.act(s, h, d)
+                s, r, d, info = env.step(a)
+                trans.record(action=a, reward=r, done_prime=d)
+
+                if d:
+                    stats.put(('episode', info[0]['episode']['l'], info[0]['episode']['r']))
+                    s = env.reset()
+                    break
+
+        # optimization =================================================================================================
+        model.train()
+
+        rollout = hist.full_rollout()
+        loss, _ = compute_loss(
+            model,
+            rollout.state,
+            s,
+            rollout.hidden[:, 0],
+            rollout.done,
+            rollout.done_prime,
+            rollout.action,
+            rollout.reward,
+            gamma=config.gamma,
+            entropy_weight=config.entropy_weight,
+            adv_norm=config.adv_norm,
+            box=isinstance(env.action_space, gym.spaces.Box))
+
+        model.zero_grad()
+        loss.mean().backward()
+        if config.grad_clip_norm is not None:
+            nn.utils.clip_grad_norm_(model.parameters(), config.grad_clip_norm)
+
+        # local gradients are applied to shared parameters, hogwild style
+        for p, shared_p in zip(model.parameters(), shared_model.parameters()):
+            shared_p._grad = p.grad
+        optimizer.step()
+
+        stats.put(('loss', loss.mean().item()))
+        with updates.get_lock():
+            updates.value += 1
+
+    env.close()
+
+
+def measure_scaling(config, processes, duration):
+    # updates per second of all workers together, for given number of worker processes
+    model, optimizer = build_shared_model(config)
+    stats = mp.Queue()
+    updates = mp.Value('l', 0)
+    stop = mp.Event()
+    workers = start_workers(config, model, optimizer, stats, updates, stop, processes=processes)
+
+    def drain():
+        try:
+            stats.get(timeout=0.1)
+        except queue.Empty:
+            pass
+
+    # startup of workers is excluded from measurement
+    while updates.value == 0:
+        drain()
+
+    start, start_updates = time.perf_counter(), updates.value
+    while time.perf_counter() - start < duration:
+        drain()
+    ups = (updates.value - start_updates) / (time.perf_counter() - start)
+
+    stop.set()
+    drain_and_join(workers, stats)
+
+    return ups
+
+
+if __name__ == '__main__':
+    main()
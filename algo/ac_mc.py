@@ -3,9 +3,7 @@ import os
 import click
 import gym
 import gym.wrappers
-import gym_minigrid
 import numpy as np
-import pybulletgym
 import torch
 import torch.nn as nn
 from all_the_tools.config import load_config
@@ -16,13 +14,12 @@ from tqdm import tqdm
 
 import utils
 import wrappers
-import wrappers.torch
-from algo.common import build_optimizer, build_env
-from history import History
+from algo.collector import collect_episodes
+from algo.common import build_optimizer, build_env, import_plugins
 from model import Model
+from transforms import apply_batch_transforms
+from vec_env import VecEnv
 
-pybulletgym
-gym_minigrid
 
 DEVICE = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
 
@@ -44,11 +41,16 @@ def main(config_path, **kwargs):
 
     writer = SummaryWriter(config.experiment_path)
 
+    import_plugins(config)
+
     seed_torch(config.seed)
-    env = wrappers.Batch(build_env(config))
+    env = VecEnv([
+        lambda: build_env(config)
+        for _ in range(config.workers)])
     if config.render:
         env = wrappers.TensorboardBatchMonitor(env, writer, config.log_interval)
-    env = wrappers.torch.Torch(env, device=DEVICE)
+    env = wrappers.Torch(env, device=DEVICE)
+    env = apply_batch_transforms(env, config.transforms)
     env.seed(config.seed)
 
     model = Model(config.model, env.observation_space, env.action_space)
@@ -71,32 +73,32 @@ def main(config_path, **kwargs):
     }
 
     # training loop ====================================================================================================
-    for episode in tqdm(range(config.episodes), desc='training'):
-        hist = History()
-        s = env.reset()
-        h = model.zero_state(1)
-        d = torch.ones(1, dtype=torch.bool)
+    episode = 0
 
+    bar = tqdm(total=config.episodes, desc='training')
+    while episode < config.episodes:
+        # every update uses group of complete episodes, one from each worker
         model.eval()
-        with torch.no_grad():
-            while True:
-                trans = hist.append_transition()
-
-                trans.record(state=s, hidden=h, done=d)
-                a, _, h = model(s, h, d)
-                a = a.sample()
-                s, r, d, info = env.step(a)
-                trans.record(action=a, reward=r)
-
-                if d:
-                    break
+        rollout, episodes = collect_episodes(env, model, config.workers)
+
+        for length, ret in episodes:
+            metrics['eps'].update(1)
+            metrics['ep/length'].update(length)
+            metrics['ep/return'].update(ret)
+            episode += 1
+            scheduler.step()
+            bar.update(1)
+
+            if episode % config.log_interval == 0 and episode > 0:
+                for k in metrics:
+                    writer.add_scalar(k, metrics[k].compute_and_reset(), global_step=episode)
+                torch.save(
+                    model.state_dict(),
+                    os.path.join(config.experiment_path, 'model_{}.pth'.format(episode)))
 
         # optimization =================================================================================================
         model.train()
 
-        # build rollout
-        rollout = hist.full_rollout()
-
         # loss
         loss = compute_loss(env, model, rollout, metrics, config)
 
@@ -110,18 +112,9 @@ def main(config_path, **kwargs):
         if config.grad_clip_norm is not None:
             nn.utils.clip_grad_norm_(model.parameters(), config.grad_clip_norm)
         optimizer.step()
-        scheduler.step()
-
-        metrics['eps'].update(1)
-        metrics['ep/length'].update(info[0]['episode']['l'])
-        metrics['ep/return'].update(info[0]['episode']['r'])
 
-        if episode % config.log_interval == 0 and episode > 0:
-            for k in metrics:
-                writer.add_scalar(k, metrics[k].compute_and_reset(), global_step=episode)
-            torch.save(
-                model.state_dict(),
-                os.path.join(config.experiment_path, 'model_{}.pth'.format(episode)))
+    bar.close()
+    env.close()
 
 
 def compute_loss(env, model, rollout, metrics, config):
@@ -135,7 +128,7 @@ def compute_loss(env, model, rollout, metrics, config):
     # actor
     advantages = errors.detach()
     if config.adv_norm:
-        advantages = utils.normalize(advantages)
+        advantages = utils.normalize(advantages, rollout.mask)
 
     log_prob = dist.log_prob(rollout.action)
     entropy = dist.entropy()
@@ -147,14 +140,15 @@ def compute_loss(env, model, rollout, metrics, config):
     actor_loss = -log_prob * advantages + \
                  config.entropy_weight * -entropy
 
-    # loss
-    loss = (actor_loss + 0.5 * critic_loss).mean(1)
+    # loss, mean over valid steps of every episode
+    mask = rollout.mask.float()
+    loss = ((actor_loss + 0.5 * critic_loss) * mask).sum(1) / mask.sum(1)
 
     # metrics
-    metrics['rollout/reward'].update(rollout.reward.data.cpu().numpy())
-    metrics['rollout/value'].update(values.data.cpu().numpy())
-    metrics['rollout/advantage'].update(advantages.data.cpu().numpy())
-    metrics['rollout/entropy'].update(entropy.data.cpu().numpy())
+    metrics['rollout/reward'].update(rollout.reward[rollout.mask].data.cpu().numpy())
+    metrics['rollout/value'].update(values[rollout.mask].data.cpu().numpy())
+    metrics['rollout/advantage'].update(advantages[rollout.mask].data.cpu().numpy())
+    metrics['rollout/entropy'].update(entropy[rollout.mask].data.cpu().numpy())
 
     return loss
 
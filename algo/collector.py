@@ -0,0 +1,120 @@
+import copy
+import queue
+import threading
+
+import torch
+
+from history import History, RolloutBuffer
+from weight_store import WeightStore
+
+
+def collect(env, model, buffer, state):
+    s, h, d = state
+    episodes = []
+
+    with torch.no_grad():
+        for t in range(buffer.horizon):
+            buffer.record(t, state=s, hidden=h, done=d)
+            a, _, h = model.act(s, h, d)
+            s, r, d, info = env.step(a)
+            buffer.record(t, action=a, reward=r, done_prime=d)
+
+            indices, = torch.where(d)
+            for i in indices:
+                episodes.append((info[i]['episode']['l'], info[i]['episode']['r']))
+
+    return buffer.rollout(), (s, h, d), episodes
+
+
+def collect_episodes(env, model, workers):
+    # runs single episode in every worker, steps taken after worker's episode has finished are masked out,
+    # so episodes of different lengths end up packed into padded [workers, max_length] rollout
+    hist = History()
+    episodes = [None] * workers
+
+    s = env.reset()
+    h = model.zero_state(workers)
+    d = torch.ones(workers, dtype=torch.bool)
+    active = torch.ones(workers, dtype=torch.bool, device=s.device)
+
+    with torch.no_grad():
+        while active.any():
+            trans = hist.append_transition()
+
+            trans.record(state=s, hidden=h, done=d, mask=active)
+            a, _, h = model.act(s, h, d)
+            s, r, d, info = env.step(a)
+            trans.record(action=a, reward=torch.where(active, r, torch.zeros_like(r)))
+
+            indices, = torch.where(d & active)
+            for i in indices:
+                episodes[i] = (info[i]['episode']['l'], info[i]['episode']['r'])
+            active = active & ~d
+
+    return hist.full_rollout(), episodes
+
+
+class Collector(object):
+    # collects rollout with learner's model in between updates
+    def __init__(self, env, model, horizon, state):
+        self.env = env
+        self.model = model
+        self.buffer = RolloutBuffer(horizon)
+        self.state = state
+
+    def next(self):
+        rollout, self.state, episodes = collect(self.env, self.model, self.buffer, self.state)
+
+        return rollout, self.state[0], episodes
+
+    def update(self, model):
+        pass
+
+    def close(self):
+        pass
+
+
+class PipelinedCollector(object):
+    # collects next rollout in background thread while learner trains on current one, so rollouts lag behind
+    # learner by at most one update. two buffers are swapped between collector and learner, buffer is returned
+    # to collector only after update which consumed it, and only after new weights were published
+    def __init__(self, env, model, horizon, state):
+        self.model = copy.deepcopy(model)
+        self.store = WeightStore(model, readers=1)
+        self.free = queue.Queue()
+        self.full = queue.Queue()
+        self.current = None
+        self.stop_event = threading.Event()
+
+        for _ in range(2):
+            self.free.put(RolloutBuffer(horizon))
+
+        self.thread = threading.Thread(target=self.run, args=(env, state), daemon=True)
+        self.thread.start()
+
+    def run(self, env, state):
+        version = None
+
+        while not self.stop_event.is_set():
+            buffer = self.free.get()
+            if buffer is None:
+                break
+
+            version = self.store.pull(self.model, 0, version)
+            rollout, state, episodes = collect(env, self.model, buffer, state)
+            self.full.put((buffer, rollout, state[0], episodes))
+
+    def next(self):
+        self.current, rollout, s, episodes = self.full.get()
+
+        return rollout, s, episodes
+
+    def update(self, model):
+        self.store.publish(model)
+        self.free.put(self.current)
+        self.current = None
+
+    def close(self):
+        self.stop_event.set()
+        self.free.put(None)
+        self.thread.join()
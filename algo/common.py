@@ -1,22 +1,55 @@
+import queue
+import time
+
 import gym
 import gym.wrappers
 import torch
 
-from transforms import apply_transforms
+import wrappers
+from envs import import_env_plugin, import_transform_plugins
+from model.export import fold_batch_renorm
+from model.quantize import quantize_actor
+from transforms import apply_batch_transforms, apply_transforms
 
 
-def build_optimizer(optimizer, parameters):
+def build_optimizer(optimizer, parameters, foreach=None):
     if optimizer.type == 'momentum':
-        return torch.optim.SGD(parameters, optimizer.lr, momentum=0.9, weight_decay=0.)
+        return torch.optim.SGD(parameters, optimizer.lr, momentum=0.9, weight_decay=0., foreach=foreach)
     elif optimizer.type == 'rmsprop':
-        return torch.optim.RMSprop(parameters, optimizer.lr, weight_decay=0.)
+        return torch.optim.RMSprop(parameters, optimizer.lr, weight_decay=0., foreach=foreach)
     elif optimizer.type == 'adam':
-        return torch.optim.Adam(parameters, optimizer.lr, weight_decay=0.)
+        return torch.optim.Adam(parameters, optimizer.lr, weight_decay=0., foreach=foreach)
     else:
         raise AssertionError('invalid optimizer.type {}'.format(optimizer.type))
 
 
+def share_optimizer_state(optimizer):
+    # optimizer state is created eagerly with a zero gradient step and moved to shared memory,
+    # so processes holding this optimizer update the same moments
+    for group in optimizer.param_groups:
+        for p in group['params']:
+            p.grad = torch.zeros_like(p)
+    optimizer.step()
+    optimizer.zero_grad()
+
+    for state in optimizer.state.values():
+        for k in state:
+            if torch.is_tensor(state[k]):
+                state[k].zero_()
+                state[k].share_memory_()
+            else:
+                state[k] = 0
+
+
+def import_plugins(config):
+    # imported once in the main process before workers are forked, so they inherit registered envs
+    # and loaded modules instead of importing them on their own
+    import_env_plugin(config.env)
+    import_transform_plugins(config.transforms)
+
+
 def build_env(config):
+    import_env_plugin(config.env)
     env = gym.make(config.env)
     env = gym.wrappers.RecordEpisodeStatistics(env)
     if isinstance(env.action_space, gym.spaces.Box):
@@ -26,3 +59,49 @@ def build_env(config):
     env = apply_transforms(env, config.transforms)
 
     return env
+
+
+def probe_spaces(config):
+    # observation and action spaces after batch transforms, so models can be built before worker envs exist
+    env = apply_batch_transforms(wrappers.Batch(build_env(config)), config.transforms)
+    observation_space, action_space = env.observation_space, env.action_space
+    env.close()
+
+    return observation_space, action_space
+
+
+def drain_and_join(processes, results):
+    # results are drained until processes exit, so ones blocked on put can observe stop event and finish
+    while any(process.is_alive() for process in processes):
+        try:
+            results.get(timeout=1.)
+        except queue.Empty:
+            pass
+    for process in processes:
+        process.join()
+
+
+def build_actor(model, config):
+    # model used for rollout collection, rebuilt from learner weights after every update
+    if config.get('quantize_actor', False):
+        return quantize_actor(model)
+    elif config.get('fold_actor', False):
+        return fold_batch_renorm(model)
+    else:
+        return model
+
+
+class StartupReport(object):
+    def __init__(self):
+        self.last = time.perf_counter()
+        self.stages = []
+
+    def record(self, stage):
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def __str__(self):
+        return 'startup: {:.2f}s ({})'.format(
+            sum(t for _, t in self.stages),
+            ', '.join('{} {:.2f}s'.format(stage, t) for stage, t in self.stages))
@@ -0,0 +1,97 @@
+import itertools
+import os
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+
+def launch(train, config):
+    # runs train(rank, config) in config.learners processes, every learner owns its own shard of envs
+    learners = config.get('learners', 1)
+    if learners == 1:
+        train(0, config)
+    else:
+        mp.spawn(train, args=(config,), nprocs=learners)
+
+
+def init(rank, config):
+    learners = config.get('learners', 1)
+    if learners == 1:
+        return
+
+    os.environ.setdefault('MASTER_ADDR', '127.0.0.1')
+    os.environ.setdefault('MASTER_PORT', str(config.get('master_port', 29500)))
+    dist.init_process_group('gloo', rank=rank, world_size=learners)
+
+
+def cleanup():
+    if is_distributed():
+        dist.destroy_process_group()
+
+
+def is_distributed():
+    return dist.is_available() and dist.is_initialized()
+
+
+def is_master():
+    return not is_distributed() or dist.get_rank() == 0
+
+
+def broadcast_state(model):
+    # parameters and buffers of every replica are overwritten with ones from rank 0, so replicas start from
+    # identical weights and are kept in lockstep by averaging gradients every update
+    if not is_distributed():
+        return
+
+    for tensor in model.state_dict().values():
+        dist.broadcast(tensor, 0)
+
+
+def broadcast_buffers(model):
+    # buffers (e.g. batch renorm running statistics) are not covered by gradient averaging
+    if not is_distributed():
+        return
+
+    for tensor in model.buffers():
+        dist.broadcast(tensor, 0)
+
+
+def all_reduce_grads(parameters):
+    # gradients are averaged across replicas with single all-reduce over flattened buffer
+    if not is_distributed():
+        return
+
+    grads = [p.grad for p in parameters if p.grad is not None]
+    flat = torch.cat([g.reshape(-1) for g in grads])
+    dist.all_reduce(flat)
+    flat /= dist.get_world_size()
+
+    offset = 0
+    for g in grads:
+        g.copy_(flat[offset:offset + g.numel()].view_as(g))
+        offset += g.numel()
+
+
+def all_gather(obj):
+    if not is_distributed():
+        return [obj]
+
+    objs = [None] * dist.get_world_size()
+    dist.all_gather_object(objs, obj)
+
+    return objs
+
+
+def count_episodes(episodes, episode, metrics, scheduler, bar):
+    # episodes finished by all learners are counted on every replica, so episode count and lr schedule stay
+    # identical across replicas, returns updated episode count
+    for length, ret in itertools.chain.from_iterable(all_gather(episodes)):
+        metrics['eps'].update(1)
+        metrics['ep/length'].update(length)
+        metrics['ep/return'].update(ret)
+        episode += 1
+        scheduler.step()
+        bar.update(1)
+
+    return episode
@@ -1,88 +1,75 @@
-import argparse
+import os
 
-import gym_minigrid
+import click
 import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim
+from all_the_tools.config import load_config
 from all_the_tools.metrics import Mean, FPS, Last
-from all_the_tools.torch.utils import seed_torch, one_hot
+from all_the_tools.torch.utils import seed_torch
 from tensorboardX import SummaryWriter
 from tqdm import tqdm
 
 import wrappers
-import wrappers.torch
-from algo.common import build_optimizer, build_env
-from history import History
+from algo.common import build_optimizer, build_env, import_plugins
+from algo.exploration import build_exploration
+from history import ReplayBuffer
 from model import ModelDQN
-from utils import one_step_discounted_return
+from transforms import apply_batch_transforms
 from vec_env import VecEnv
 
-gym_minigrid
 
 DEVICE = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
 
 
 # TODO: revisit stat calculation
-# TODO: normalize advantage?
 # TODO: normalize input (especially images)
 
 
-def build_parser():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--experiment-path', type=str, default='./tf_log/pg-mc')
-    parser.add_argument('--config-path', type=str, required=True)
-    parser.add_argument('--no-render', action='store_true')
-
-    return parser
-
-
-def sample_action(action_value, e):
-    greedy = one_hot(action_value.argmax(-1), action_value.size(-1))
-    random = torch.full_like(greedy, 1 / action_value.size(-1))
-
-    probs = torch.where(
-        torch.empty(greedy.size(0), 1, device=greedy.device).uniform_() > e,
-        greedy,
-        random)
-
-    dist = torch.distributions.Categorical(probs=probs)
-
-    return dist.sample()
-
-
-def main():
-    args = build_parser().parse_args()
-    config = build_default_config()
-    config.merge_from_file(args.config_path)
-    config.experiment_path = args.experiment_path
-    config.render = not args.no_render
-    config.freeze()
-    del args
+@click.command()
+@click.option('--config-path', type=click.Path(), required=True)
+@click.option('--experiment-path', type=click.Path(), required=True)
+@click.option('--restore-path', type=click.Path())
+@click.option('--render', is_flag=True)
+def main(config_path, **kwargs):
+    config = load_config(
+        config_path,
+        **kwargs)
+    del config_path, kwargs
 
     writer = SummaryWriter(config.experiment_path)
 
+    import_plugins(config)
+
     seed_torch(config.seed)
     env = VecEnv([
         lambda: build_env(config)
         for _ in range(config.workers)])
     if config.render:
         env = wrappers.TensorboardBatchMonitor(env, writer, config.log_interval)
-    env = wrappers.torch.Torch(env, device=DEVICE)
+    env = wrappers.Torch(env, device=DEVICE)
+    env = apply_batch_transforms(env, config.transforms)
     env.seed(config.seed)
 
     policy_model = ModelDQN(config.model, env.observation_space, env.action_space).to(DEVICE)
+    if config.restore_path is not None:
+        policy_model.load_state_dict(torch.load(config.restore_path))
     target_model = ModelDQN(config.model, env.observation_space, env.action_space).to(DEVICE)
     target_model.load_state_dict(policy_model.state_dict())
     optimizer = build_optimizer(config.opt, policy_model.parameters())
+    # exploration schedule is precomputed for every env step
+    exploration = build_exploration(config.exploration, env.action_space.n, config.workers, DEVICE)
     scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, config.episodes)
 
     metrics = {
         'loss': Mean(),
         'lr': Last(),
         'eps': FPS(),
+        'ups': FPS(),
         'ep/length': Mean(),
-        'ep/reward': Mean(),
+        'ep/return': Mean(),
+        'rollout/action_value': Mean(),
     }
 
     # ==================================================================================================================
@@ -90,69 +77,105 @@ def main():
     policy_model.train()
     target_model.eval()
     episode = 0
+    step = 0
+    updates = 0
+    # fractional number of learner updates owed to collected env steps
+    update_credit = 0.
     s = env.reset()
-    e_base = 0.95
-    e_step = np.exp(np.log(0.05 / e_base) / config.episodes)
 
     bar = tqdm(total=config.episodes, desc='training')
-    history = History()
+    replay = ReplayBuffer(config.replay.capacity)
     while episode < config.episodes:
         with torch.no_grad():
-            for _ in range(config.horizon):
-                av = policy_model(s)
-                a = sample_action(av, e_base * e_step**episode)
-                s_prime, r, d, meta = env.step(a)
-                history.append(state=s.cpu(), action=a.cpu(), reward=r.cpu(), done=d.cpu(), state_prime=s_prime.cpu())
-                # history.append(state=s, action=a, reward=r, done=d, state_prime=s_prime)
-                s = s_prime
-
-                indices, = torch.where(d)
-                for i in indices:
-                    metrics['eps'].update(1)
-                    metrics['ep/length'].update(meta[i]['episode']['l'])
-                    metrics['ep/reward'].update(meta[i]['episode']['r'])
-                    episode += 1
-                    scheduler.step()
-                    bar.update(1)
-
-                    if episode % 10 == 0:
-                        target_model.load_state_dict(policy_model.state_dict())
-
-                    if episode % config.log_interval == 0 and episode > 0:
-                        for k in metrics:
-                            writer.add_scalar(k, metrics[k].compute_and_reset(), global_step=episode)
-                        writer.add_scalar('e', e_base * e_step**episode, global_step=episode)
-                        writer.add_histogram('rollout/action', rollout.actions, global_step=episode)
-                        writer.add_histogram('rollout/reward', rollout.rewards, global_step=episode)
-                        writer.add_histogram('rollout/return', returns, global_step=episode)
-                        writer.add_histogram('rollout/action_value', action_values, global_step=episode)
-
-        rollout = history.full_rollout()
-        action_values = policy_model(rollout.states)
-        action_values = action_values * one_hot(rollout.actions, action_values.size(-1))
-        action_values = action_values.sum(-1)
-        with torch.no_grad():
-            action_values_prime = target_model(rollout.states_prime)
-            action_values_prime, _ = action_values_prime.detach().max(-1)
-        returns = one_step_discounted_return(rollout.rewards, action_values_prime, rollout.dones, gamma=config.gamma)
+            av = policy_model(s)
+            a = exploration(av, step)
+            s_prime, r, d, info = env.step(a)
+            replay.append(state=s, action=a, reward=r, done=d)
+            s = s_prime
+            step += 1
+
+        indices, = torch.where(d)
+        for i in indices:
+            metrics['eps'].update(1)
+            metrics['ep/length'].update(info[i]['episode']['l'])
+            metrics['ep/return'].update(info[i]['episode']['r'])
+            episode += 1
+            scheduler.step()
+            bar.update(1)
+
+            if episode % config.log_interval == 0 and episode > 0:
+                for k in metrics:
+                    writer.add_scalar(k, metrics[k].compute_and_reset(), global_step=episode)
+                writer.add_scalar('exploration', exploration.value(step).mean(), global_step=episode)
+                torch.save(
+                    policy_model.state_dict(),
+                    os.path.join(config.experiment_path, 'model_{}.pth'.format(episode)))
+
+        if len(replay) < config.replay.warmup:
+            continue
+
+        # replay ratio fixes number of learner updates per env step, so cost does not grow with size of replay
+        update_credit += config.replay.ratio
+        while update_credit >= 1:
+            update_credit -= 1
+
+            batch = replay.sample(config.batch_size, n=config.n_step, gamma=config.gamma)
+            loss, stats = compute_loss(policy_model, target_model, batch, config)
+
+            for k in stats:
+                metrics[k].update(stats[k].data.cpu().numpy())
+            metrics['loss'].update(loss.data.cpu().numpy())
+            metrics['lr'].update(np.squeeze(scheduler.get_last_lr()))
+            metrics['ups'].update(1)
+
+            # training
+            optimizer.zero_grad()
+            loss.mean().backward()
+            if config.grad_clip_norm is not None:
+                nn.utils.clip_grad_norm_(policy_model.parameters(), config.grad_clip_norm)
+            optimizer.step()
+
+            updates += 1
+            if updates % config.target_update.interval == 0:
+                update_target(target_model, policy_model, config.target_update.tau)
 
-        # critic
-        errors = returns - action_values
-        critic_loss = errors**2
+    bar.close()
+    env.close()
 
-        loss = (critic_loss * 0.5).mean(1)
 
-        metrics['loss'].update(loss.data.cpu().numpy())
-        metrics['lr'].update(np.squeeze(scheduler.get_lr()))
+def compute_loss(policy_model, target_model, batch, config):
+    action_values = policy_model(batch.state)
+    action_values = action_values.gather(-1, batch.action.unsqueeze(-1)).squeeze(-1)
 
-        # training
-        optimizer.zero_grad()
-        loss.mean().backward()
-        nn.utils.clip_grad_norm_(policy_model.parameters(), 0.5)
-        optimizer.step()
+    with torch.no_grad():
+        if config.double:
+            # action is selected by online network and evaluated by target network
+            action_prime = policy_model(batch.state_prime).argmax(-1)
+            action_values_prime = target_model(batch.state_prime)
+            action_values_prime = action_values_prime.gather(-1, action_prime.unsqueeze(-1)).squeeze(-1)
+        else:
+            action_values_prime, _ = target_model(batch.state_prime).max(-1)
+        returns = batch.n_step_return + batch.discount * action_values_prime
 
-    bar.close()
-    env.close()
+    # critic
+    errors = returns - action_values
+    loss = errors**2 * 0.5
+
+    stats = {
+        'rollout/action_value': action_values,
+    }
+
+    return loss, stats
+
+
+def update_target(target_model, policy_model, tau):
+    # hard copy for tau = 1, polyak averaging otherwise, applied in-place
+    target = [v for v in target_model.state_dict().values() if v.is_floating_point()]
+    policy = [v for v in policy_model.state_dict().values() if v.is_floating_point()]
+
+    with torch.no_grad():
+        for t, p in zip(target, policy):
+            t.lerp_(p, tau)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,70 @@
+import math
+
+import torch
+
+
+def exponential_schedule(start, end, steps):
+    # values decaying geometrically from start to end, precomputed once for every step
+    return torch.logspace(math.log10(start), math.log10(end), steps)
+
+
+def apex_epsilons(size, base=0.4, alpha=7.):
+    # fixed epsilon for each actor, eps_i = base^(1 + alpha * i / (size - 1)), as in Ape-X
+    i = torch.arange(size, dtype=torch.float)
+
+    return base**(1 + alpha * i / max(size - 1, 1))
+
+
+class Exploration(object):
+    def __init__(self, schedule, device):
+        # [steps] for schedule shared by all actors, [steps, size] for per-actor schedules
+        self.schedule = schedule.to(device)
+
+    def value(self, step):
+        return self.schedule[min(step, self.schedule.size(0) - 1)]
+
+
+class EpsilonGreedy(Exploration):
+    def __init__(self, schedule, num_actions, size, device):
+        super().__init__(schedule, device)
+
+        self.num_actions = num_actions
+        self.uniform = torch.empty(size, device=device)
+        self.random = torch.empty(size, dtype=torch.long, device=device)
+
+    def __call__(self, action_value, step):
+        greedy = action_value.argmax(-1)
+        self.uniform.uniform_()
+        self.random.random_(0, self.num_actions)
+
+        return torch.where(self.uniform < self.value(step), self.random, greedy)
+
+
+class Boltzmann(Exploration):
+    def __init__(self, schedule, num_actions, size, device):
+        super().__init__(schedule, device)
+
+        self.gumbel = torch.empty(size, num_actions, device=device)
+
+    def __call__(self, action_value, step):
+        # gumbel-max sample from softmax(action_value / temperature), without building distribution
+        self.gumbel.exponential_().log_().neg_()
+        temperature = self.value(step)
+        if temperature.dim() == 1:
+            temperature = temperature.unsqueeze(-1)
+
+        return (action_value / temperature).add_(self.gumbel).argmax(-1)
+
+
+def build_exploration(exploration, num_actions, size, device):
+    if exploration.type == 'epsilon_greedy':
+        schedule = exponential_schedule(exploration.start, exploration.end, exploration.steps)
+        return EpsilonGreedy(schedule, num_actions, size, device)
+    elif exploration.type == 'apex':
+        schedule = apex_epsilons(size, exploration.base, exploration.alpha).unsqueeze(0)
+        return EpsilonGreedy(schedule, num_actions, size, device)
+    elif exploration.type == 'boltzmann':
+        schedule = exponential_schedule(exploration.start, exploration.end, exploration.steps)
+        return Boltzmann(schedule, num_actions, size, device)
+    else:
+        raise AssertionError('invalid exploration.type {}'.format(exploration.type))
@@ -0,0 +1,253 @@
+import os
+import queue
+
+import click
+import gym
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+import torch.nn as nn
+import torch.optim
+from all_the_tools.config import load_config
+from all_the_tools.metrics import Mean, Last, FPS
+from all_the_tools.torch.utils import seed_torch
+from tensorboardX import SummaryWriter
+from tqdm import tqdm
+
+import utils
+import wrappers
+from algo.common import build_optimizer, build_env, import_plugins, probe_spaces, drain_and_join
+from history import History, Rollout
+from inference_server import InferenceServer, act
+from model import Model
+from transforms import apply_batch_transforms
+from vec_env import VecEnv
+from weight_store import WeightStore
+
+DEVICE = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
+
+
+@click.command()
+@click.option('--config-path', type=click.Path(), required=True)
+@click.option('--experiment-path', type=click.Path(), required=True)
+@click.option('--restore-path', type=click.Path())
+def main(config_path, **kwargs):
+    config = load_config(
+        config_path,
+        **kwargs)
+    del config_path, kwargs
+
+    writer = SummaryWriter(config.experiment_path)
+
+    import_plugins(config)
+
+    seed_torch(config.seed)
+    observation_space, action_space = probe_spaces(config)
+
+    model = Model(config.model, observation_space, action_space)
+    if config.restore_path is not None:
+        model.load_state_dict(torch.load(config.restore_path))
+
+    server = None
+    if config.get('inference_server') is not None:
+        # actors only step envs, policy forward for all of them is batched in single server process
+        server = InferenceServer(
+            model,
+            observation_space,
+            action_space,
+            clients=config.actors,
+            slots=config.workers,
+            max_batch=config.inference_server.max_batch,
+            max_latency=config.inference_server.max_latency)
+
+    # policy copy in shared memory, actors read weights from it, learner writes to it after every update
+    store = WeightStore(model, readers=1 if server is not None else config.actors)
+    if server is not None:
+        # started before learner touches device, so server process can initialize it on its own
+        server.start(config, store, DEVICE)
+
+    model = model.to(DEVICE)
+    optimizer = build_optimizer(config.opt, model.parameters())
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, config.episodes)
+
+    rollouts = mp.Queue(maxsize=config.queue_size)
+    stop = mp.Event()
+    actors = [
+        mp.Process(target=actor, args=(
+            rank, config, store, server.client(rank) if server is not None else None, rollouts, stop))
+        for rank in range(config.actors)]
+    for process in actors:
+        process.start()
+
+    metrics = {
+        'loss': Mean(),
+        'lr': Last(),
+        'eps': FPS(),
+        'ep/length': Mean(),
+        'ep/return': Mean(),
+        'rollout/reward': Mean(),
+        'rollout/value': Mean(),
+        'rollout/advantage': Mean(),
+        'rollout/entropy': Mean(),
+        'rollout/ratio': Mean(),
+        'actor/lag': Mean(),
+    }
+
+    # training loop ====================================================================================================
+    episode = 0
+
+    bar = tqdm(total=config.episodes, desc='training')
+    while episode < config.episodes:
+        data, state_prime, episodes = rollouts.get()
+        rollout = Rollout({k: data[k].to(DEVICE) for k in data})
+        state_prime = state_prime.to(DEVICE)
+
+        for length, ret in episodes:
+            metrics['eps'].update(1)
+            metrics['ep/length'].update(length)
+            metrics['ep/return'].update(ret)
+            episode += 1
+            scheduler.step()
+            bar.update(1)
+
+            if episode % config.log_interval == 0 and episode > 0:
+                for k in metrics:
+                    writer.add_scalar(k, metrics[k].compute_and_reset(), global_step=episode)
+                torch.save(
+                    model.state_dict(),
+                    os.path.join(config.experiment_path, 'model_{}.pth'.format(episode)))
+
+        # optimization =================================================================================================
+        model.train()
+
+        loss, stats = compute_loss(action_space, model, rollout, state_prime, config)
+
+        for k in stats:
+            metrics[k].update(stats[k].data.cpu().numpy())
+        metrics['loss'].update(loss.data.cpu().numpy())
+        metrics['lr'].update(np.squeeze(scheduler.get_last_lr()))
+        metrics['actor/lag'].update(np.array(store.lag()))
+
+        optimizer.zero_grad()
+        loss.mean().backward()
+        if config.grad_clip_norm is not None:
+            nn.utils.clip_grad_norm_(model.parameters(), config.grad_clip_norm)
+        optimizer.step()
+
+        store.publish(model)
+
+    bar.close()
+
+    stop.set()
+    drain_and_join(actors, rollouts)
+    if server is not None:
+        server.stop()
+
+
+def actor(rank, config, store, client, rollouts, stop):
+    torch.set_num_threads(1)
+    seed_torch(config.seed + rank)
+
+    env = VecEnv([
+        lambda: build_env(config)
+        for _ in range(config.workers)])
+    env = wrappers.Torch(env, device=torch.device('cpu'))
+    env = apply_batch_transforms(env, config.transforms)
+    env.seed(config.seed + rank * config.workers)
+
+    if client is None:
+        model = Model(config.model, env.observation_space, env.action_space)
+        model.eval()
+        h = model.zero_state(config.workers)
+
+    s = env.reset()
+    d = torch.ones(config.workers, dtype=torch.bool)
+    version = None
+
+    while not stop.is_set():
+        if client is None:
+            version = store.pull(model, rank, version)
+            h_start = h
+        else:
+            h_start = client.hidden()
+
+        hist = History()
+        episodes = []
+
+        with torch.no_grad():
+            for _ in range(config.horizon):
+                trans = hist.append_transition()
+
+                trans.record(state=s, done=d)
+                if client is None:
+                    a, log_prob, h = act(model, env.action_space, s, h, d)
+                else:
+                    a, log_prob = client.act(s, d)
+                s, r, d, info = env.step(a)
+                trans.record(action=a, reward=r, done_prime=d, log_prob=log_prob)
+
+                indices, = torch.where(d)
+                for i in indices:
+                    episodes.append((info[i]['episode']['l'], info[i]['episode']['r']))
+
+        rollout = hist.full_rollout()
+        data = dict(rollout.data, hidden=h_start)
+
+        while not stop.is_set():
+            try:
+                rollouts.put((data, s.clone(), episodes), timeout=1.)
+                break
+            except queue.Full:
+                pass
+
+    env.close()
+
+
+def compute_loss(action_space, model, rollout, state_prime, config):
+    dist, values, value_prime = model.evaluate_rollout(
+        rollout.state, state_prime, rollout.hidden, rollout.done, rollout.done_prime)
+
+    log_prob = dist.log_prob(rollout.action)
+    entropy = dist.entropy()
+
+    if isinstance(action_space, gym.spaces.Box):
+        log_prob = log_prob.sum(-1)
+        entropy = entropy.sum(-1)
+
+    # v-trace correction for lag between actor policy which collected rollout and current learner policy
+    with torch.no_grad():
+        log_ratios = log_prob - rollout.log_prob
+        vs, advantages = utils.vtrace(
+            log_ratios,
+            rollout.reward,
+            values,
+            value_prime,
+            rollout.done_prime,
+            gamma=config.gamma,
+            max_rho=config.max_rho,
+            max_c=config.max_c)
+
+    # critic
+    errors = vs - values
+    critic_loss = errors**2
+
+    # actor
+    actor_loss = -log_prob * advantages + \
+                 config.entropy_weight * -entropy
+
+    # loss
+    loss = (actor_loss + 0.5 * critic_loss).mean(1)
+
+    stats = {
+        'rollout/reward': rollout.reward,
+        'rollout/value': values,
+        'rollout/advantage': advantages,
+        'rollout/entropy': entropy,
+        'rollout/ratio': log_ratios.exp(),
+    }
+
+    return loss, stats
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+import os
+
+import click
+import gym
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim
+from all_the_tools.config import load_config
+from all_the_tools.metrics import Mean, Last, FPS
+from all_the_tools.torch.utils import seed_torch
+from tensorboardX import SummaryWriter
+from tqdm import tqdm
+
+import utils
+import wrappers
+from algo.common import build_optimizer, build_env, import_plugins
+from history import History, Rollout
+from model import Model
+from transforms import apply_batch_transforms
+from vec_env import VecEnv
+
+DEVICE = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
+
+
+@click.command()
+@click.option('--config-path', type=click.Path(), required=True)
+@click.option('--experiment-path', type=click.Path(), required=True)
+@click.option('--restore-path', type=click.Path())
+@click.option('--render', is_flag=True)
+def main(config_path, **kwargs):
+    config = load_config(
+        config_path,
+        **kwargs)
+    del config_path, kwargs
+
+    writer = SummaryWriter(config.experiment_path)
+
+    import_plugins(config)
+
+    seed_torch(config.seed)
+    env = VecEnv([
+        lambda: build_env(config)
+        for _ in range(config.workers)])
+    if config.render:
+        env = wrappers.TensorboardBatchMonitor(env, writer, config.log_interval)
+    env = wrappers.Torch(env, device=DEVICE)
+    env = apply_batch_transforms(env, config.transforms)
+    env.seed(config.seed)
+
+    model = Model(config.model, env.observation_space, env.action_space)
+    model = model.to(DEVICE)
+    if config.restore_path is not None:
+        model.load_state_dict(torch.load(config.restore_path))
+    optimizer = build_optimizer(config.opt, model.parameters())
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, config.episodes)
+
+    # recurrent policies are trained on sequences of seq_len steps, each starting from hidden state recorded
+    # during rollout, feed-forward policies on independent transitions
+    seq_len = config.get('seq_len', 1 if config.model.rnn.type == 'noop' else config.horizon)
+    assert config.horizon % seq_len == 0
+
+    metrics = {
+        'loss': Mean(),
+        'lr': Last(),
+        'eps': FPS(),
+        'ep/length': Mean(),
+        'ep/return': Mean(),
+        'rollout/reward': Mean(),
+        'rollout/value': Mean(),
+        'rollout/advantage': Mean(),
+        'rollout/entropy': Mean(),
+        'rollout/ratio': Mean(),
+        'rollout/clip_frac': Mean(),
+    }
+
+    # training loop ====================================================================================================
+    episode = 0
+
+    s = env.reset()
+    h = model.zero_state(config.workers)
+    d = torch.ones(config.workers, dtype=torch.bool)
+
+    bar = tqdm(total=config.episodes, desc='training')
+    while episode < config.episodes:
+        hist = History()
+
+        model.eval()
+        with torch.no_grad():
+            for _ in range(config.horizon):
+                trans = hist.append_transition()
+
+                trans.record(state=s, hidden=h, done=d)
+                dist, value, h = model(s, h, d)
+                a = dist.sample()
+                log_prob = dist.log_prob(a)
+                if isinstance(env.action_space, gym.spaces.Box):
+                    log_prob = log_prob.sum(-1)
+                s, r, d, info = env.step(a)
+                trans.record(action=a, reward=r, done_prime=d, log_prob=log_prob, value=value)
+
+                indices, = torch.where(d)
+                for i in indices:
+                    metrics['eps'].update(1)
+                    metrics['ep/length'].update(info[i]['episode']['l'])
+                    metrics['ep/return'].update(info[i]['episode']['r'])
+                    episode += 1
+                    scheduler.step()
+                    bar.update(1)
+
+                    if episode % config.log_interval == 0 and episode > 0:
+                        for k in metrics:
+                            writer.add_scalar(k, metrics[k].compute_and_reset(), global_step=episode)
+                        torch.save(
+                            model.state_dict(),
+                            os.path.join(config.experiment_path, 'model_{}.pth'.format(episode)))
+
+            _, value_prime, _ = model.act(s, h, d, value=True)
+
+        # optimization =================================================================================================
+        rollout = hist.full_rollout()
+        advantages = utils.generalized_advantage_estimation(
+            rollout.reward, rollout.value, value_prime, rollout.done_prime, gamma=config.gamma, lam=config.lam)
+        rollout = Rollout(dict(rollout.data, advantage=advantages, returns=advantages + rollout.value))
+        rollout = build_sequences(rollout, seq_len)
+
+        metrics['lr'].update(np.squeeze(scheduler.get_last_lr()))
+
+        for loss, stats in optimize(env, model, optimizer, rollout, config):
+            for k in stats:
+                metrics[k].update(stats[k].data.cpu().numpy())
+            metrics['loss'].update(loss.data.cpu().numpy())
+
+    bar.close()
+    env.close()
+
+
+def optimize(env, model, optimizer, rollout, config):
+    # loss is computed in eval mode, same as behaviour log-probs and values, so ratio of unchanged policy is
+    # exactly 1, normalization statistics are updated from rollout once all epochs are done
+    model.eval()
+
+    # every rollout is reused for several epochs of shuffled minibatch updates
+    for _ in range(config.epochs):
+        for minibatch in shuffled_minibatches(rollout, config.minibatches):
+            loss, stats = compute_loss(env, model, minibatch, config)
+
+            optimizer.zero_grad()
+            loss.mean().backward()
+            if config.grad_clip_norm is not None:
+                nn.utils.clip_grad_norm_(model.parameters(), config.grad_clip_norm)
+            optimizer.step()
+
+            yield loss, stats
+
+    update_statistics(model, rollout)
+
+
+def update_statistics(model, rollout):
+    # train mode forward without gradients only updates running statistics of normalization layers
+    model.train()
+    with torch.no_grad():
+        model.features(rollout.state, rollout.hidden, rollout.done)
+    model.eval()
+
+
+def build_sequences(rollout, seq_len):
+    # [b, t, ...] -> [b * t / seq_len, seq_len, ...], every sequence keeps hidden state of its first step
+    b, t = rollout.reward.size()
+    data = {
+        k: rollout.data[k].reshape(b * t // seq_len, seq_len, *rollout.data[k].size()[2:])
+        for k in rollout.data}
+    data['hidden'] = data['hidden'][:, 0]
+
+    return Rollout(data)
+
+
+def shuffled_minibatches(rollout, minibatches):
+    indices = torch.randperm(rollout.reward.size(0), device=rollout.reward.device)
+
+    for chunk in torch.chunk(indices, minibatches):
+        yield Rollout({k: rollout.data[k][chunk] for k in rollout.data})
+
+
+def compute_loss(env, model, rollout, config):
+    features, _ = model.features(rollout.state, rollout.hidden, rollout.done)
+    dist = model.policy(features)
+    values = model.value_function(features)
+
+    log_prob = dist.log_prob(rollout.action)
+    entropy = dist.entropy()
+
+    if isinstance(env.action_space, gym.spaces.Box):
+        log_prob = log_prob.sum(-1)
+        entropy = entropy.sum(-1)
+
+    # critic
+    critic_loss = (rollout.returns - values)**2
+
+    # actor
+    advantages = rollout.advantage
+    if config.adv_norm:
+        advantages = utils.normalize(advantages)
+
+    # clipped surrogate objective keeps updated policy close to one which collected rollout
+    ratio = (log_prob - rollout.log_prob).exp()
+    clipped_ratio = ratio.clamp(1 - config.clip_eps, 1 + config.clip_eps)
+    actor_loss = -torch.min(ratio * advantages, clipped_ratio * advantages) + \
+                 config.entropy_weight * -entropy
+
+    # loss
+    loss = (actor_loss + 0.5 * critic_loss).mean(1)
+
+    stats = {
+        'rollout/reward': rollout.reward,
+        'rollout/value': values,
+        'rollout/advantage': advantages,
+        'rollout/entropy': entropy,
+        'rollout/ratio': ratio,
+        'rollout/clip_frac': (ratio != clipped_ratio).float(),
+    }
+
+    return loss, stats
+
+
+if __name__ == '__main__':
+    main()
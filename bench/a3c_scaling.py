@@ -0,0 +1,34 @@
+import os
+
+import click
+from all_the_tools.config import load_config
+
+from algo.a3c import measure_scaling
+from algo.common import import_plugins
+
+
+@click.command()
+@click.option('--config-path', type=click.Path(), required=True)
+@click.option('--processes', type=str, default=None)
+@click.option('--duration', type=float, default=30.)
+def main(config_path, processes, duration):
+    config = load_config(config_path)
+    import_plugins(config)
+
+    if processes is None:
+        processes = [2**i for i in range(os.cpu_count().bit_length()) if 2**i <= os.cpu_count()]
+    else:
+        processes = list(map(int, processes.split(',')))
+
+    print('{:>10} {:>12} {:>10}'.format('processes', 'updates/s', 'speedup'))
+    base = None
+    for n in processes:
+        ups = measure_scaling(config, n, duration)
+        if base is None:
+            base = ups / n
+
+        print('{:>10} {:>12.1f} {:>10.2f}'.format(n, ups, ups / base))
+
+
+if __name__ == '__main__':
+    main()
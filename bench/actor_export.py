@@ -0,0 +1,41 @@
+import click
+import gym
+import torch
+
+from bench.common import ENCODERS, build_model, sample_input, measure
+from model.export import export_actor
+
+
+@click.command()
+@click.option('--batch-sizes', type=str, default='1,8,32')
+@click.option('--iterations', type=int, default=1000)
+@click.option('--threads', type=int, default=1)
+def main(batch_sizes, iterations, threads):
+    torch.set_num_threads(threads)
+    action_space = gym.spaces.Discrete(4)
+
+    # forward: full forward with distribution and value head, then sample, as rollouts did before act
+    print('{:>10} {:>6} {:>12} {:>12} {:>12} {:>8}'.format(
+        'encoder', 'batch', 'forward, ms', 'act, ms', 'traced, ms', 'speedup'))
+    for encoder in ENCODERS:
+        model, state_space = build_model(encoder, action_space)
+        model.eval()
+
+        for batch_size in map(int, batch_sizes.split(',')):
+            input = sample_input(state_space, batch_size)
+            h = model.zero_state(batch_size)
+            d = torch.ones(batch_size, dtype=torch.bool)
+            actor = export_actor(model, input)
+
+            eager = measure(lambda: model.act(input, h, d), iterations=iterations)
+            with torch.no_grad():
+                forward = measure(lambda: model(input, h, d)[0].sample(), iterations=iterations)
+                traced = measure(lambda: actor.act(input, h, d), iterations=iterations)
+
+            # speedup of traced act over forward(...).sample()
+            print('{:>10} {:>6} {:>12.3f} {:>12.3f} {:>12.3f} {:>8.2f}'.format(
+                encoder, batch_size, forward * 1000, eager * 1000, traced * 1000, forward / traced))
+
+
+if __name__ == '__main__':
+    main()
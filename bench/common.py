@@ -0,0 +1,45 @@
+import time
+
+import gym
+import numpy as np
+import torch
+from all_the_tools.config import Config as C
+
+from model import Model
+
+ENCODERS = {
+    'fc': (
+        C(type='fc', out_features=32),
+        gym.spaces.Box(low=-1., high=1., shape=(32,), dtype=np.float32)),
+    'conv': (
+        C(type='conv', base_channels=16, out_features=128, input_dtype='uint8'),
+        gym.spaces.Box(low=0, high=255, shape=(4, 84, 84), dtype=np.uint8)),
+    'gridworld': (
+        C(type='gridworld', base_channels=8, out_features=32),
+        gym.spaces.Box(low=0, high=8, shape=(7, 7), dtype=np.int64)),
+}
+
+
+def build_model(encoder, action_space, rnn='noop'):
+    encoder, state_space = ENCODERS[encoder]
+    model = Model(C(encoder=encoder, rnn=C(type=rnn)), state_space, action_space)
+
+    return model, state_space
+
+
+def sample_input(state_space, batch_size):
+    input = np.stack([state_space.sample() for _ in range(batch_size)], 0)
+    input = torch.tensor(input)
+
+    return input
+
+
+def measure(fn, iterations=100, warmup=10):
+    for _ in range(warmup):
+        fn()
+
+    t = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+
+    return (time.perf_counter() - t) / iterations
@@ -0,0 +1,58 @@
+import click
+import gym
+import numpy as np
+import torch
+
+from bench.common import sample_input, measure
+from model.encoder import ConvEncoder
+
+MODES = {
+    'fp32': dict(channels_last=False, bf16=False),
+    'channels_last': dict(channels_last=True, bf16=False),
+    'bf16': dict(channels_last=False, bf16=True),
+    'channels_last_bf16': dict(channels_last=True, bf16=True),
+}
+
+
+@click.command()
+@click.option('--batch-sizes', type=str, default='32,256')
+@click.option('--iterations', type=int, default=20)
+@click.option('--threads', type=int)
+def main(batch_sizes, iterations, threads):
+    if threads is not None:
+        torch.set_num_threads(threads)
+    torch.manual_seed(42)
+    state_space = gym.spaces.Box(low=0, high=255, shape=(4, 84, 84), dtype=np.uint8)
+
+    reference = ConvEncoder(state_space, 16, 128, input_dtype='uint8')
+    encoders = {}
+    for mode, kwargs in MODES.items():
+        encoders[mode] = ConvEncoder(state_space, 16, 128, input_dtype='uint8', **kwargs)
+        encoders[mode].load_state_dict(reference.state_dict())
+
+    print('{:>18} {:>6} {:>14} {:>14} {:>10}'.format(
+        'mode', 'batch', 'infer, fr/s', 'train, fr/s', 'max err'))
+    for batch_size in map(int, batch_sizes.split(',')):
+        input = sample_input(state_space, batch_size)
+        with torch.no_grad():
+            expected = reference(input)
+
+        for mode, encoder in encoders.items():
+            def infer():
+                with torch.no_grad():
+                    return encoder(input)
+
+            def train():
+                encoder.zero_grad()
+                encoder(input).mean().backward()
+
+            error = (infer() - expected).abs().max() / expected.abs().max()
+            t_infer = measure(infer, iterations=iterations, warmup=3)
+            t_train = measure(train, iterations=iterations, warmup=3)
+
+            print('{:>18} {:>6} {:>14.1f} {:>14.1f} {:>10.2e}'.format(
+                mode, batch_size, batch_size / t_infer, batch_size / t_train, error.item()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import click
+import gym
+import torch
+import torch.nn as nn
+from all_the_tools.config import Config as C
+
+from algo.a2c_rnn import compute_loss
+from algo.common import build_optimizer
+from bench.common import ENCODERS, build_model, sample_input, measure
+from history import Rollout
+
+
+def build_rollout(model, state_space, action_space, workers, horizon):
+    state = sample_input(state_space, workers * horizon)
+    state = state.view(workers, horizon, *state.size()[1:])
+    hidden = model.zero_state(workers).unsqueeze(1).repeat(1, horizon, 1)
+    action = torch.tensor([[action_space.sample() for _ in range(horizon)] for _ in range(workers)])
+    done = torch.rand(workers, horizon) < 0.05
+
+    return Rollout({
+        'state': state,
+        'hidden': hidden,
+        'done': done,
+        'action': action,
+        'reward': torch.randn(workers, horizon),
+        'done_prime': done,
+    })
+
+
+@click.command()
+@click.option('--encoders', type=str, default=','.join(ENCODERS))
+@click.option('--rnn', type=click.Choice(['noop', 'lstm', 'gru']), default='lstm')
+@click.option('--workers', type=int, default=32)
+@click.option('--horizon', type=int, default=32)
+@click.option('--iterations', type=int, default=20)
+def main(encoders, rnn, workers, horizon, iterations):
+    action_space = gym.spaces.Discrete(4)
+    config = C(gamma=0.99, entropy_weight=1e-2, adv_norm=True, grad_clip_norm=1., opt=C(type='adam', lr=1e-3))
+
+    print('{:>10} {:>10} {:>14}'.format('encoder', 'mode', 'updates/s'))
+    for encoder in encoders.split(','):
+        for use_compile in [False, True]:
+            model, state_space = build_model(encoder, action_space, rnn=rnn)
+            model.train()
+            rollout = build_rollout(model, state_space, action_space, workers, horizon)
+            state_prime = sample_input(state_space, workers)
+
+            optimizer = build_optimizer(config.opt, model.parameters(), foreach=True if use_compile else None)
+            loss_fn = torch.compile(compute_loss) if use_compile else compute_loss
+
+            def step():
+                loss, _ = loss_fn(
+                    model,
+                    rollout.state,
+                    state_prime,
+                    rollout.hidden[:, 0],
+                    rollout.done,
+                    rollout.done_prime,
+                    rollout.action,
+                    rollout.reward,
+                    gamma=config.gamma,
+                    entropy_weight=config.entropy_weight,
+                    adv_norm=config.adv_norm,
+                    box=False)
+                optimizer.zero_grad()
+                loss.mean().backward()
+                nn.utils.clip_grad_norm_(
+                    model.parameters(), config.grad_clip_norm, foreach=True if use_compile else None)
+                optimizer.step()
+
+            t = measure(step, iterations=iterations, warmup=3)
+
+            print('{:>10} {:>10} {:>14.2f}'.format(encoder, 'compiled' if use_compile else 'eager', 1 / t))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import click
+import gym
+import torch
+
+from bench.common import measure
+from model.policy import PolicyBeta, PolicyKumaraswamy, PolicyNormal
+
+POLICIES = {
+    'beta': PolicyBeta,
+    'kumaraswamy': PolicyKumaraswamy,
+    'normal': PolicyNormal,
+}
+
+
+@click.command()
+@click.option('--batch-sizes', type=str, default='1,32,256')
+@click.option('--action-size', type=int, default=17)
+@click.option('--in-features', type=int, default=32)
+@click.option('--iterations', type=int, default=1000)
+@click.option('--threads', type=int, default=1)
+def main(batch_sizes, action_size, in_features, iterations, threads):
+    torch.set_num_threads(threads)
+    action_space = gym.spaces.Box(low=0., high=1., shape=(action_size,))
+
+    print('{:>12} {:>6} {:>16} {:>16} {:>16}'.format(
+        'policy', 'batch', 'sample, act/s', 'dist, act/s', 'loss, act/s'))
+    for name, policy in POLICIES.items():
+        policy = policy(in_features, action_space)
+
+        for batch_size in map(int, batch_sizes.split(',')):
+            input = torch.randn(batch_size, in_features)
+            action = torch.rand(batch_size, action_size).clamp_(1e-3, 1 - 1e-3)
+
+            def loss():
+                dist = policy(input)
+                return dist.log_prob(action).sum(-1) + dist.entropy().sum(-1)
+
+            with torch.no_grad():
+                t_sample = measure(lambda: policy.sample(input), iterations=iterations)
+                t_dist = measure(lambda: policy(input).sample(), iterations=iterations)
+            t_loss = measure(loss, iterations=iterations)
+
+            print('{:>12} {:>6} {:>16.0f} {:>16.0f} {:>16.0f}'.format(
+                name, batch_size, batch_size / t_sample, batch_size / t_dist, batch_size / t_loss))
+
+
+if __name__ == '__main__':
+    main()
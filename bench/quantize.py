@@ -0,0 +1,42 @@
+import click
+import gym
+import torch
+
+from bench.common import ENCODERS, build_model, sample_input, measure
+from model.quantize import quantize_actor, policy_drift
+
+
+@click.command()
+@click.option('--batch-sizes', type=str, default='1,8,32')
+@click.option('--iterations', type=int, default=1000)
+@click.option('--threads', type=int, default=1)
+def main(batch_sizes, iterations, threads):
+    torch.set_num_threads(threads)
+    action_spaces = {
+        'discrete': gym.spaces.Discrete(4),
+        'box': gym.spaces.Box(low=0., high=1., shape=(17,)),
+    }
+
+    print('{:>10} {:>9} {:>6} {:>10} {:>10} {:>8} {:>10}'.format(
+        'encoder', 'action', 'batch', 'fp32, ms', 'int8, ms', 'speedup', 'kl'))
+    for encoder in ENCODERS:
+        for action, action_space in action_spaces.items():
+            model, state_space = build_model(encoder, action_space)
+            model.eval()
+            actor = quantize_actor(model)
+
+            for batch_size in map(int, batch_sizes.split(',')):
+                input = sample_input(state_space, batch_size)
+                h = model.zero_state(batch_size)
+                d = torch.ones(batch_size, dtype=torch.bool)
+
+                fp32 = measure(lambda: model.act(input, h, d), iterations=iterations)
+                int8 = measure(lambda: actor.act(input, h, d), iterations=iterations)
+                kl = policy_drift(model, actor, action_space, input, h, d).mean()
+
+                print('{:>10} {:>9} {:>6} {:>10.3f} {:>10.3f} {:>8.2f} {:>10.2e}'.format(
+                    encoder, action, batch_size, fp32 * 1000, int8 * 1000, fp32 / int8, kl.item()))
+
+
+if __name__ == '__main__':
+    main()
@@ -9,22 +9,23 @@ config = C(
         C(type='adj_max'),
         C(type='grayscale'),
         # C(type='resize', size=84),
-        C(type='stack', k=4, dim=0),
         C(type='skip', k=4),
-        C(type='normalize'),
+        C(type='batch_stack', k=4, dim=0),
     ],
     gamma=0.99,
     entropy_weight=1e-2,
+    adv_norm=False,
+    grad_clip_norm=1.,
     horizon=8,
     workers=32,
     model=C(
         encoder=C(
-            pre=C(
-                type='conv',
-                base_channels=16,
-                out_features=128,
-            ),
-            rnn=None)),
+            type='conv',
+            base_channels=16,
+            out_features=128,
+            input_dtype='uint8'),
+        rnn=C(
+            type='noop')),
     opt=C(
         type='adam',
         lr=1e-3))
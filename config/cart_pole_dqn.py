@@ -0,0 +1,34 @@
+from all_the_tools.config import Config as C
+
+config = C(
+    seed=42,
+    env='CartPole-v1',
+    episodes=10000,
+    log_interval=100,
+    transforms=[],
+    gamma=0.99,
+    grad_clip_norm=10.,
+    workers=8,
+    batch_size=64,
+    n_step=3,
+    double=True,
+    replay=C(
+        capacity=10000,
+        warmup=100,
+        ratio=1.),
+    exploration=C(
+        type='epsilon_greedy',
+        start=0.95,
+        end=0.05,
+        # number of env steps over which schedule decays, value stays at end afterwards
+        steps=50000),
+    target_update=C(
+        tau=1.,
+        interval=500),
+    model=C(
+        encoder=C(
+            type='fc',
+            out_features=32)),
+    opt=C(
+        type='adam',
+        lr=1e-3))
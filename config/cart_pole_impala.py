@@ -0,0 +1,26 @@
+from all_the_tools.config import Config as C
+
+config = C(
+    seed=42,
+    env='CartPole-v1',
+    episodes=10000,
+    log_interval=100,
+    transforms=[],
+    gamma=0.99,
+    entropy_weight=1e-2,
+    grad_clip_norm=1.,
+    max_rho=1.,
+    max_c=1.,
+    horizon=32,
+    workers=8,
+    actors=4,
+    queue_size=8,
+    model=C(
+        encoder=C(
+            type='fc',
+            out_features=32),
+        rnn=C(
+            type='noop')),
+    opt=C(
+        type='adam',
+        lr=1e-3))
@@ -0,0 +1,27 @@
+from all_the_tools.config import Config as C
+
+config = C(
+    seed=42,
+    env='CartPole-v1',
+    episodes=10000,
+    log_interval=100,
+    transforms=[],
+    gamma=0.99,
+    lam=0.95,
+    entropy_weight=1e-2,
+    adv_norm=True,
+    grad_clip_norm=0.5,
+    clip_eps=0.2,
+    epochs=4,
+    minibatches=4,
+    horizon=32,
+    workers=8,
+    model=C(
+        encoder=C(
+            type='fc',
+            out_features=32),
+        rnn=C(
+            type='noop')),
+    opt=C(
+        type='adam',
+        lr=3e-4))
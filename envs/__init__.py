@@ -1 +1,2 @@
 from envs.k_armed_bandit import KArmedBandit
+from envs.registry import import_env_plugin, import_transform_plugins
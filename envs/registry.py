@@ -0,0 +1,28 @@
+import importlib
+
+# env id substring -> module which registers matching envs with gym when imported
+ENV_PLUGINS = [
+    ('MiniGrid-', 'gym_minigrid'),
+    ('PyBulletEnv-', 'pybulletgym'),
+    ('PongDuel-', 'ma_gym'),
+]
+
+
+def import_env_plugin(env_id):
+    for pattern, module in ENV_PLUGINS:
+        if pattern in env_id:
+            return importlib.import_module(module)
+
+    return None
+
+
+# transform type -> module which the transform imports lazily inside env workers
+TRANSFORM_PLUGINS = [
+    ('resize', 'cv2'),
+]
+
+
+def import_transform_plugins(transforms):
+    types = {transform.type for transform in transforms}
+
+    return [importlib.import_module(module) for type, module in TRANSFORM_PLUGINS if type in types]
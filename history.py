@@ -42,6 +42,75 @@ class Rollout(object):
     def __getattr__(self, key):
         return self.data[key]
 
+    def split(self, chunks):
+        # splits along batch dimension, every chunk holds complete sequences of subset of envs
+        data = {k: torch.chunk(self.data[k], chunks, 0) for k in self.data}
+
+        return [Rollout(dict(zip(data, values))) for values in zip(*data.values())]
+
+
+class RolloutBuffer(object):
+    # preallocated [batch, horizon, ...] storage, filled step by step and reused across rollouts
+    def __init__(self, horizon):
+        self.horizon = horizon
+        self.data = {}
+
+    def record(self, t, **kwargs):
+        for k in kwargs:
+            value = kwargs[k]
+            if k not in self.data:
+                self.data[k] = value.new_empty(value.size(0), self.horizon, *value.size()[1:])
+            self.data[k][:, t] = value
+
+    def rollout(self):
+        return Rollout(self.data)
+
+
+class ReplayBuffer(object):
+    # ring buffer of [capacity, batch, ...] steps, n-step returns are computed at sample time from stored rewards
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = {}
+        self.steps = 0
+
+    def __len__(self):
+        return min(self.steps, self.capacity)
+
+    def append(self, **kwargs):
+        i = self.steps % self.capacity
+        for k in kwargs:
+            value = kwargs[k]
+            if k not in self.data:
+                self.data[k] = value.new_empty(self.capacity, *value.size())
+            self.data[k][i] = value
+        self.steps += 1
+
+    def sample(self, size, n, gamma):
+        # state at t + n is used for bootstrap, so only steps which already have it stored can be sampled
+        assert self.steps > n
+        device = self.data['state'].device
+        start = max(0, self.steps - self.capacity)
+        t = torch.randint(start, self.steps - n, (size,), device=device)
+        b = torch.randint(0, self.data['state'].size(1), (size,), device=device)
+
+        ret = torch.zeros(size, device=device)
+        discount = torch.ones(size, device=device)
+        for k in range(n):
+            i = (t + k) % self.capacity
+            ret += discount * self.data['reward'][i, b]
+            discount *= gamma * (~self.data['done'][i, b]).float()
+
+        i = t % self.capacity
+        i_prime = (t + n) % self.capacity
+
+        return Rollout({
+            'state': self.data['state'][i, b],
+            'action': self.data['action'][i, b],
+            'n_step_return': ret,
+            'discount': discount,
+            'state_prime': self.data['state'][i_prime, b],
+        })
+
 
 class Transition(object):
     def __init__(self):
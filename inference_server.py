@@ -0,0 +1,156 @@
+import queue
+import time
+
+import gym
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from model import Model
+
+
+def act(model, action_space, state, hidden, done):
+    # samples behaviour action with its log-prob, which off-policy learners use for importance weights
+    dist, _, hidden = model(state, hidden, done)
+    action = dist.sample()
+    log_prob = dist.log_prob(action)
+    if isinstance(action_space, gym.spaces.Box):
+        log_prob = log_prob.sum(-1)
+
+    return action, log_prob, hidden
+
+
+class InferenceServer(object):
+    # single process runs batched policy forward for many env clients, every client owns `slots` rows of
+    # shared state/action buffers, recurrent state is kept on server side (SEED RL style)
+    def __init__(self, model, observation_space, action_space, clients, slots, max_batch, max_latency, timeout=60.):
+        size = clients * slots
+        state = np.zeros((size, *observation_space.shape), dtype=observation_space.dtype)
+        state = torch.from_numpy(state)
+        if state.dtype == torch.float64:
+            state = state.float()
+
+        self.slots = slots
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.observation_space = observation_space
+        self.action_space = action_space
+        self.state = state.share_memory_()
+        self.hidden = model.zero_state(size).share_memory_()
+        self.done = torch.ones(size, dtype=torch.bool).share_memory_()
+        self.action = torch.zeros(size, *action_space.shape, dtype=action_dtype(action_space)).share_memory_()
+        self.log_prob = torch.zeros(size).share_memory_()
+        self.requests = mp.Queue()
+        self.responses = [mp.Event() for _ in range(clients)]
+        self.stop_event = mp.Event()
+        # set by server process on exit, including exit on error, so clients do not wait for it forever
+        self.stopped = mp.Event()
+        self.timeout = timeout
+        self.process = None
+
+    def client(self, rank):
+        return InferenceClient(self, rank)
+
+    def start(self, config, store, device):
+        self.process = mp.Process(target=serve, args=(self, config, store, device))
+        self.process.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.process.join()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['process'] = None
+
+        return state
+
+
+class InferenceClient(object):
+    def __init__(self, server, rank):
+        self.rows = slice(rank * server.slots, (rank + 1) * server.slots)
+        self.rank = rank
+        self.state = server.state
+        self.hidden_buffer = server.hidden
+        self.done = server.done
+        self.action = server.action
+        self.log_prob = server.log_prob
+        self.requests = server.requests
+        self.response = server.responses[rank]
+        self.stopped = server.stopped
+        self.timeout = server.timeout
+
+    def act(self, state, done):
+        self.state[self.rows].copy_(state)
+        self.done[self.rows].copy_(done)
+
+        self.response.clear()
+        self.requests.put(self.rank)
+        start = time.perf_counter()
+        while not self.response.wait(timeout=1.):
+            if self.stopped.is_set():
+                raise RuntimeError('inference server has stopped')
+            if time.perf_counter() - start > self.timeout:
+                raise RuntimeError('inference server did not respond in {} seconds'.format(self.timeout))
+
+        return self.action[self.rows].clone(), self.log_prob[self.rows].clone()
+
+    def hidden(self):
+        return self.hidden_buffer[self.rows].clone()
+
+
+def serve(server, config, store, device):
+    try:
+        serve_requests(server, config, store, device)
+    finally:
+        server.stopped.set()
+
+
+def serve_requests(server, config, store, device):
+    model = Model(config.model, server.observation_space, server.action_space).to(device)
+    model.eval()
+    version = None
+
+    while not server.stop_event.is_set():
+        try:
+            clients = [server.requests.get(timeout=1.)]
+        except queue.Empty:
+            continue
+
+        # batch is flushed when it is full or when first request waited for max_latency seconds
+        deadline = time.perf_counter() + server.max_latency
+        while len(clients) * server.slots < server.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                clients.append(server.requests.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        version = store.pull(model, 0, version)
+
+        rows = torch.cat([
+            torch.arange(client * server.slots, (client + 1) * server.slots)
+            for client in clients])
+        with torch.no_grad():
+            action, log_prob, hidden = act(
+                model,
+                server.action_space,
+                server.state[rows].to(device),
+                server.hidden[rows].to(device),
+                server.done[rows].to(device))
+
+        server.action[rows] = action.cpu()
+        server.log_prob[rows] = log_prob.cpu()
+        server.hidden[rows] = hidden.cpu()
+
+        for client in clients:
+            server.responses[client].set()
+
+
+def action_dtype(action_space):
+    if isinstance(action_space, gym.spaces.Discrete):
+        return torch.long
+    else:
+        return torch.float
@@ -1,39 +1,60 @@
 import gym
+import torch
 from torch import nn as nn
+from torch.utils.checkpoint import checkpoint
 
 from model.encoder import GridWorldEncoder, ConvEncoder, FCEncoder
-from model.policy import PolicyCategorical, PolicyBeta, PolicyNormal
+from model.policy import PolicyCategorical, PolicyBeta, PolicyKumaraswamy, PolicyNormal
 from model.rnn import RNN
 from model.value_function import ValueFunction
 
 
+def build_encoder(encoder, state_space):
+    if encoder.type == 'fc':
+        return FCEncoder(state_space, encoder.out_features)
+    elif encoder.type == 'conv':
+        return ConvEncoder(
+            state_space,
+            encoder.base_channels,
+            encoder.out_features,
+            input_dtype=encoder.get('input_dtype', 'float'),
+            channels_last=encoder.get('channels_last', False),
+            bf16=encoder.get('bf16', False))
+    elif encoder.type == 'gridworld':
+        return GridWorldEncoder(state_space, encoder.base_channels, encoder.out_features)
+    else:
+        raise AssertionError('invalid type {}'.format(encoder.type))
+
+
 class Model(nn.Module):
     def __init__(self, model, state_space, action_space):
-        def build_encoder():
-            if model.encoder.type == 'fc':
-                return FCEncoder(state_space, model.encoder.out_features)
-            elif model.encoder.type == 'conv':
-                return ConvEncoder(state_space, model.encoder.base_channels, model.encoder.out_features)
-            elif model.encoder.type == 'gridworld':
-                return GridWorldEncoder(state_space, model.encoder.base_channels, model.encoder.out_features)
-            else:
-                raise AssertionError('invalid type {}'.format(model.encoder.type))
-
         def build_policy():
             if isinstance(action_space, gym.spaces.Discrete):
                 return PolicyCategorical(model.encoder.out_features, action_space)
             elif isinstance(action_space, gym.spaces.Box):
-                return PolicyBeta(model.encoder.out_features, action_space)
-                # return PolicyNormal(model.encoder.out_features, action_space)
+                return build_continuous_policy()
             else:
                 raise AssertionError('invalid action_space {}'.format(action_space))
 
+        def build_continuous_policy():
+            policy = model.get('continuous_policy', 'beta')
+            if policy == 'beta':
+                return PolicyBeta(model.encoder.out_features, action_space)
+            elif policy == 'kumaraswamy':
+                return PolicyKumaraswamy(model.encoder.out_features, action_space)
+            elif policy == 'normal':
+                return PolicyNormal(model.encoder.out_features, action_space)
+            else:
+                raise AssertionError('invalid continuous_policy {}'.format(policy))
+
         def build_value_function():
             return ValueFunction(model.encoder.out_features)
 
         super().__init__()
 
-        self.encoder = build_encoder()
+        # encoder activations are recomputed during backward instead of being kept for the whole rollout batch
+        self.checkpoint_encoder = model.encoder.get('checkpoint', False)
+        self.encoder = build_encoder(model.encoder, state_space)
         self.rnn = RNN(model.rnn.type, model.encoder.out_features, model.encoder.out_features)
         self.policy = build_policy()
         self.value_function = build_value_function()
@@ -41,13 +62,67 @@ class Model(nn.Module):
         self.apply(self.weight_init)
 
     def forward(self, input, h, d):
-        input = self.encoder(input)
-        input, h = self.rnn(input, h, d)
+        input, h = self.features(input, h, d)
         dist = self.policy(input)
         value = self.value_function(input)
 
         return dist, value, h
 
+    def features(self, input, h, d):
+        if self.checkpoint_encoder and self.training and torch.is_grad_enabled():
+            input = self.checkpointed_encoder(input)
+        else:
+            input = self.encoder(input)
+        input, h = self.rnn(input, h, d)
+
+        return input, h
+
+    def evaluate_rollout(self, state, state_prime, hidden, done, done_prime):
+        # single forward over T + 1 observations, last one is only used for bootstrap value
+        state = torch.cat([state, state_prime.unsqueeze(1)], 1)
+        done = torch.cat([done, done_prime[:, -1:]], 1)
+        features, _ = self.features(state, hidden, done)
+
+        dist = self.policy(features[:, :-1])
+        values = self.value_function(features)
+
+        return dist, values[:, :-1], values[:, -1].detach()
+
+    def checkpointed_encoder(self, input):
+        # recompute during backward runs encoder forward again, running statistics (e.g. of batch renorm) are
+        # rolled back to their values before first forward for recompute and restored afterwards,
+        # so recomputed activations match and statistics are updated once per step
+        buffers = list(self.encoder.buffers())
+        before = [b.clone() for b in buffers]
+        recompute = []
+
+        def run(input):
+            if not recompute:
+                recompute.append(True)
+                return self.encoder(input)
+
+            with torch.no_grad():
+                current = [b.clone() for b in buffers]
+                for b, value in zip(buffers, before):
+                    b.copy_(value)
+            output = self.encoder(input)
+            with torch.no_grad():
+                for b, value in zip(buffers, current):
+                    b.copy_(value)
+
+            return output
+
+        return checkpoint(run, input, use_reentrant=False)
+
+    # inference-only path for rollout collection: samples actions directly and skips value head unless requested
+    @torch.no_grad()
+    def act(self, input, h, d, value=False):
+        input, h = self.features(input, h, d)
+        action = self.policy.sample(input)
+        value = self.value_function(input) if value else None
+
+        return action, value, h
+
     def zero_state(self, batch_size):
         return self.rnn.zero_state(batch_size)
 
@@ -62,27 +137,16 @@ class Model(nn.Module):
                 nn.init.constant_(m.bias, 0)
 
 
-# TODO: refactor
 class ModelDQN(nn.Module):
     def __init__(self, model, state_space, action_space):
-        def build_encoder():
-            if model.encoder.type == 'dense':
-                return FCEncoder(state_space, model.size)
-            elif model.encoder.type == 'conv':
-                return ConvEncoder(state_space, model.encoder.size, model.size)
-            elif model.encoder.type == 'gridworld':
-                return GridWorldEncoder(state_space, model.size)
-            else:
-                raise AssertionError('invalid model.encoder.type {}'.format(model.encoder.type))
-
-        def build_action_value_functoin():
+        def build_action_value_function():
             return nn.Sequential(
-                nn.Linear(model.size, action_space.n))
+                nn.Linear(model.encoder.out_features, action_space.n))
 
         super().__init__()
 
-        self.encoder = build_encoder()
-        self.action_value_function = build_action_value_functoin()
+        self.encoder = build_encoder(model.encoder, state_space)
+        self.action_value_function = build_action_value_function()
 
     def forward(self, input):
         input = self.encoder(input)
@@ -1,7 +1,8 @@
+import torch
 import torch.nn as nn
 from batchrenorm import BatchRenorm2d
 
-from model.layers import Activation
+from model.layers import Activation, Normalize, NoOp
 
 
 class FCEncoder(nn.Module):
@@ -21,14 +22,25 @@ class FCEncoder(nn.Module):
 
 
 class ConvEncoder(nn.Module):
-    def __init__(self, state_space, base_channels, out_features):
+    def __init__(self, state_space, base_channels, out_features, input_dtype='float', channels_last=False, bf16=False):
         assert len(state_space.shape) == 3
 
         super().__init__()
 
+        self.channels_last = channels_last
+        self.bf16 = bf16
+
+        # uint8 observations are normalized here, on the model's device, instead of inside every env worker
+        if input_dtype == 'uint8':
+            self.input = Normalize()
+        elif input_dtype == 'float':
+            self.input = NoOp()
+        else:
+            raise AssertionError('invalid input_dtype {}'.format(input_dtype))
+
         self.layers = nn.Sequential(
-            # nn.BatchNorm2d(state_space.shape[2]),
-            nn.Conv2d(state_space.shape[2], base_channels * 2**2, 7, stride=2, padding=3),
+            # nn.BatchNorm2d(state_space.shape[0]),
+            nn.Conv2d(state_space.shape[0], base_channels * 2**2, 7, stride=2, padding=3),
             Activation(),
             nn.MaxPool2d(3, 2),
             nn.Conv2d(base_channels * 2**2, base_channels * 2**3, 3, stride=2, padding=1),
@@ -42,7 +54,10 @@ class ConvEncoder(nn.Module):
             nn.Linear(base_channels * 2**5, out_features),
             Activation())
 
-    def forward(self, input, h, d):
+        if self.channels_last:
+            self.layers = self.layers.to(memory_format=torch.channels_last)
+
+    def forward(self, input):
         dim = input.dim()
 
         if dim == 5:
@@ -50,15 +65,21 @@ class ConvEncoder(nn.Module):
             input = input.reshape(b * t, c, h, w)
 
         assert input.dim() == 4
-        input = self.layers(input)
-        input = self.pool(input)
-        input = input.view(input.size(0), input.size(1))
-        input = self.output(input)
+        input = self.input(input)
+        if self.channels_last:
+            input = input.contiguous(memory_format=torch.channels_last)
+
+        with torch.autocast(input.device.type, dtype=torch.bfloat16, enabled=self.bf16):
+            input = self.layers(input)
+            input = self.pool(input)
+            input = input.view(input.size(0), input.size(1))
+            input = self.output(input)
+        input = input.float()
 
         if dim == 5:
             input = input.view(b, t, input.size(1))
 
-        return input, h
+        return input
 
 
 class GridWorldEncoder(nn.Module):
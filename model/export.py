@@ -0,0 +1,78 @@
+import copy
+
+import torch
+from batchrenorm import BatchRenorm2d
+from torch import nn as nn
+
+from model.layers import NoOp
+
+
+class Actor(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+
+        self.model = model
+
+    def forward(self, input, h, d):
+        return self.act(input, h, d)
+
+    def act(self, input, h, d):
+        action, _, h = self.model.act(input, h, d)
+
+        return action, h
+
+
+def export_actor(model, input, path=None):
+    # traced with example batch of observations, traced actor has stable act(input, h, d) -> (action, h) signature
+    # (also exposed as forward) and can be loaded by torch.jit.load without importing training code
+    h = model.zero_state(input.size(0)).to(input.device)
+    d = torch.ones(input.size(0), dtype=torch.bool, device=input.device)
+
+    actor = Actor(fold_batch_renorm(model)).eval()
+    with torch.no_grad():
+        actor = torch.jit.trace_module(
+            actor, {'act': (input, h, d), 'forward': (input, h, d)}, check_trace=False)
+
+    if path is not None:
+        torch.jit.save(actor, path)
+
+    return actor
+
+
+def fold_batch_renorm(model):
+    # inference-mode copy where every conv followed by batch renorm is replaced with a single conv,
+    # normalization with running statistics is folded into conv weights and bias
+    model = copy.deepcopy(model).eval()
+
+    for module in list(model.modules()):
+        if not isinstance(module, nn.Sequential):
+            continue
+
+        for i in range(len(module) - 1):
+            if isinstance(module[i], nn.Conv2d) and isinstance(module[i + 1], BatchRenorm2d):
+                module[i] = fold_conv(module[i], module[i + 1])
+                module[i + 1] = NoOp()
+
+    return model
+
+
+@torch.no_grad()
+def fold_conv(conv, norm):
+    scale = norm.weight / norm.running_std
+    shift = norm.bias - norm.running_mean * scale
+    bias = conv.bias if conv.bias is not None else torch.zeros_like(shift)
+
+    folded = nn.Conv2d(
+        conv.in_channels,
+        conv.out_channels,
+        conv.kernel_size,
+        stride=conv.stride,
+        padding=conv.padding,
+        dilation=conv.dilation,
+        groups=conv.groups,
+        bias=True)
+    folded = folded.to(conv.weight.device)
+    folded.weight.copy_(conv.weight * scale.view(-1, 1, 1, 1))
+    folded.bias.copy_(bias * scale + shift)
+
+    return folded
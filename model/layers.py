@@ -1,3 +1,4 @@
+import torch
 from torch import nn as nn
 
 
@@ -9,3 +10,11 @@ class NoOp(nn.Module):
 class Activation(nn.ReLU):
     def __init__(self):
         super().__init__(inplace=True)
+
+
+class Normalize(nn.Module):
+    def forward(self, input):
+        assert input.dtype == torch.uint8
+        input = input.float().sub_(255 / 2).div_(255 / 2)
+
+        return input
@@ -21,6 +21,14 @@ class PolicyCategorical(nn.Module):
 
         return dist
 
+    def sample(self, input):
+        input = self.layers(input)
+        # gumbel-max trick, samples from categorical without building distribution
+        input = input - torch.empty_like(input).exponential_().log_()
+        action = input.argmax(-1)
+
+        return action
+
 
 class PolicyBeta(nn.Module):
     def __init__(self, in_features, action_space):
@@ -43,6 +51,52 @@ class PolicyBeta(nn.Module):
 
         return dist
 
+    def sample(self, input):
+        input = self.layers(input)
+        input = F.softplus(input) + 1.
+
+        a, b = torch.chunk(input, 2, -1)
+        action = torch.distributions.Beta(a, b, validate_args=False).sample()
+
+        return action
+
+
+class PolicyKumaraswamy(nn.Module):
+    def __init__(self, in_features, action_space):
+        super().__init__()
+
+        assert np.array_equal(action_space.low, np.zeros_like(action_space.low))
+        assert np.array_equal(action_space.high, np.ones_like(action_space.high))
+
+        self.layers = nn.Sequential(
+            nn.Linear(in_features, in_features),
+            Activation(),
+            nn.Linear(in_features, np.prod(action_space.shape) * 2))
+
+    def forward(self, input):
+        input = self.layers(input)
+        input = F.softplus(input) + 1.
+
+        a, b = torch.chunk(input, 2, -1)
+        dist = torch.distributions.Kumaraswamy(a, b, validate_args=False)
+
+        return dist
+
+    def sample(self, input):
+        input = self.layers(input)
+        input = F.softplus(input) + 1.
+
+        # inverse cdf, unlike beta needs single uniform sample and no rejection sampling.
+        # computed in log space, since (1 - u)^(1 / b) rounds to 1 for large b in float32
+        a, b = torch.chunk(input, 2, -1)
+        u = torch.rand_like(a)
+        action = torch.log(-torch.expm1(torch.log1p(-u) / b)).div(a).exp()
+        # same support as torch beta sampler, so log_prob of sampled action is always finite
+        finfo = torch.finfo(action.dtype)
+        action = action.clamp(finfo.tiny, 1 - finfo.eps)
+
+        return action
+
 
 class PolicyNormal(nn.Module):
     def __init__(self, in_features, action_space):
@@ -62,3 +116,10 @@ class PolicyNormal(nn.Module):
         dist = torch.distributions.Normal(mean, F.softplus(std))
 
         return dist
+
+    def sample(self, input):
+        input = self.layers(input)
+        mean, std = torch.chunk(input, 2, -1)
+        action = mean + F.softplus(std) * torch.randn_like(mean)
+
+        return action
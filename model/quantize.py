@@ -0,0 +1,34 @@
+import gym
+import torch
+from torch import nn as nn
+
+from model.export import fold_batch_renorm
+
+
+def quantize_actor(model):
+    # learner keeps fp32 weights, actor gets a copy with int8 linear layers which is rebuilt after every update
+    model = fold_batch_renorm(model).cpu()
+    model = torch.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+    return model
+
+
+@torch.no_grad()
+def policy_drift(model, actor, action_space, input, h, d, samples=16):
+    # reference policy is evaluated in eval mode, so running statistics are neither used from batch nor updated
+    training = model.training
+    model.eval()
+    dist, _, _ = model(input, h, d)
+    model.train(training)
+    dist_actor, _, _ = actor(input, h, d)
+
+    try:
+        kl = torch.distributions.kl_divergence(dist, dist_actor)
+    except NotImplementedError:
+        # no closed form (e.g. kumaraswamy), monte carlo estimate from samples of reference policy
+        action = dist.sample((samples,))
+        kl = (dist.log_prob(action) - dist_actor.log_prob(action)).mean(0)
+    if isinstance(action_space, gym.spaces.Box):
+        kl = kl.sum(-1)
+
+    return kl
@@ -1,38 +1,42 @@
 import torch
 import torch.nn as nn
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
 
 
-class GRUCell(nn.Module):
-    def __init__(self, in_feautures, out_fearures):
+class GRU(nn.Module):
+    def __init__(self, in_features, out_features):
         super().__init__()
 
-        self.cell = nn.GRUCell(in_feautures, out_fearures)
+        self.rnn = nn.GRU(in_features, out_features, batch_first=True)
 
     def forward(self, input, hidden):
-        hidden = self.cell(input, hidden)
+        input, hidden = self.rnn(input, hidden.unsqueeze(0))
+        hidden = hidden.squeeze(0)
+
+        return input, hidden
 
-        return hidden, hidden
+    def zero_state(self, batch_size):
+        return torch.zeros(batch_size, self.rnn.hidden_size)
 
 
-class LSTMCell(nn.Module):
+class LSTM(nn.Module):
     def __init__(self, in_features, out_features):
         super().__init__()
 
-        self.cell = nn.LSTMCell(in_features, out_features)
+        self.rnn = nn.LSTM(in_features, out_features, batch_first=True)
 
     def forward(self, input, hidden):
-        hidden = torch.chunk(hidden, 2, 1)
-        hidden = self.cell(input, hidden)
-        input = hidden[0]
-        hidden = torch.cat(hidden, 1)
+        hidden = tuple(h.unsqueeze(0).contiguous() for h in torch.chunk(hidden, 2, 1))
+        input, hidden = self.rnn(input, hidden)
+        hidden = torch.cat([h.squeeze(0) for h in hidden], 1)
 
         return input, hidden
 
     def zero_state(self, batch_size):
-        return torch.zeros(batch_size, self.cell.hidden_size * 2)
+        return torch.zeros(batch_size, self.rnn.hidden_size * 2)
 
 
-class NoOpCell(nn.Module):
+class NoOp(nn.Module):
     def __init__(self, in_features, out_features):
         assert in_features == out_features
 
@@ -47,17 +51,16 @@ class NoOpCell(nn.Module):
         return torch.zeros(batch_size, 1)
 
 
-# TODO: debug loop
 class RNN(nn.Module):
     def __init__(self, type, in_features, out_features):
         super().__init__()
 
         if type == 'gru':
-            self.rnn = GRUCell(in_features, out_features)
-        if type == 'lstm':
-            self.rnn = LSTMCell(in_features, out_features)
+            self.rnn = GRU(in_features, out_features)
+        elif type == 'lstm':
+            self.rnn = LSTM(in_features, out_features)
         elif type == 'noop':
-            self.rnn = NoOpCell(in_features, out_features)
+            self.rnn = NoOp(in_features, out_features)
         else:
             raise ValueError('invalid type {}'.format(type))
 
@@ -68,7 +71,10 @@ class RNN(nn.Module):
             done = done.unsqueeze(1)
             squeeze = True
 
-        input, hidden = self.rnn_loop(input, hidden, done)
+        if input.size(1) == 1 or isinstance(self.rnn, NoOp):
+            input, hidden = self.rnn_loop(input, hidden, done)
+        else:
+            input, hidden = self.rnn_segments(input, hidden, done)
 
         if squeeze:
             input = input.squeeze(1)
@@ -79,13 +85,44 @@ class RNN(nn.Module):
         outputs = []
         for t in range(input.size(1)):
             hidden = self.reset_state(hidden, done[:, t])
-            output, hidden = self.rnn(input[:, t], hidden)
+            output, hidden = self.rnn(input[:, t:t + 1], hidden)
             outputs.append(output)
 
-        outputs = torch.stack(outputs, 1)
+        outputs = torch.cat(outputs, 1)
 
         return outputs, hidden
 
+    def rnn_segments(self, input, hidden, done):
+        # splits every sequence at done boundaries and runs all segments as one packed sequence,
+        # so fused rnn kernel is used instead of python loop over timesteps
+        b, t = done.size()
+
+        start = done.clone()
+        start[:, 0] = True
+        start = start.view(b * t)
+        segment = torch.cumsum(start.long(), 0) - 1
+        segment_start, = torch.where(start)
+        position = torch.arange(b * t, device=input.device) - segment_start[segment]
+        lengths = torch.bincount(segment)
+
+        segments = input.new_zeros(segment_start.size(0), t, input.size(2))
+        segments[segment, position] = input.reshape(b * t, input.size(2))
+        segments = pack_padded_sequence(segments, lengths.cpu(), batch_first=True, enforce_sorted=False)
+
+        # first segment of each sequence continues from hidden, others start from zero state
+        first = segment.view(b, t)[:, 0]
+        last = segment.view(b, t)[:, -1]
+        segment_hidden = hidden.new_zeros(segment_start.size(0), hidden.size(1))
+        segment_hidden[first] = self.reset_state(hidden, done[:, 0])
+
+        segments, segment_hidden = self.rnn(segments, segment_hidden)
+        segments, _ = pad_packed_sequence(segments, batch_first=True)
+
+        output = segments[segment, position].view(b, t, segments.size(2))
+        hidden = segment_hidden[last]
+
+        return output, hidden
+
     def reset_state(self, h, d):
         return torch.where(d.unsqueeze(-1), torch.zeros_like(h), h)
 
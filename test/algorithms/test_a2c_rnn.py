@@ -0,0 +1,50 @@
+import gym
+import torch
+from all_the_tools.config import Config as C
+
+from algo.a2c_rnn import compute_loss
+from history import Rollout
+from model import Model
+
+
+def test_micro_batches_reproduce_full_batch_gradient():
+    torch.manual_seed(42)
+
+    workers, horizon = 7, 5
+    state_space = gym.spaces.Box(low=-1, high=1, shape=(4,))
+    action_space = gym.spaces.Discrete(3)
+    model = Model(C(encoder=C(type='fc', out_features=16), rnn=C(type='noop')), state_space, action_space)
+
+    rollout = Rollout({
+        'state': torch.randn(workers, horizon, 4),
+        'hidden': model.zero_state(workers).unsqueeze(1).repeat(1, horizon, 1),
+        'done': torch.rand(workers, horizon) < 0.2,
+        'action': torch.randint(0, 3, (workers, horizon)),
+        'reward': torch.randn(workers, horizon),
+        'done_prime': torch.rand(workers, horizon) < 0.2,
+    })
+    state_prime = torch.randn(workers, 4)
+
+    def gradients(micro_batches):
+        model.zero_grad()
+        # 7 envs in 4 chunks gives uneven micro-batches of 2, 2, 2 and 1 envs
+        for rollout_chunk, s_chunk in zip(rollout.split(micro_batches), torch.chunk(state_prime, micro_batches, 0)):
+            loss, _ = compute_loss(
+                model,
+                rollout_chunk.state,
+                s_chunk,
+                rollout_chunk.hidden[:, 0],
+                rollout_chunk.done,
+                rollout_chunk.done_prime,
+                rollout_chunk.action,
+                rollout_chunk.reward,
+                gamma=0.9,
+                entropy_weight=1e-2,
+                adv_norm=False,
+                box=False)
+            (loss.sum() / workers).backward()
+
+        return [p.grad.clone() for p in model.parameters()]
+
+    for expected, actual in zip(gradients(1), gradients(4)):
+        assert torch.allclose(actual, expected, atol=1e-6)
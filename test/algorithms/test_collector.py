@@ -0,0 +1,55 @@
+import time
+
+import torch
+import torch.nn as nn
+
+from algo.collector import PipelinedCollector
+
+
+class DummyEnv(object):
+    # reward of every step is action taken, so rollout tells which weights collected it
+    def step(self, action):
+        return torch.zeros(2, 1), action.float(), torch.zeros(2, dtype=torch.bool), [None, None]
+
+
+class VersionModel(nn.Module):
+    def __init__(self):
+        super().__init__()
+
+        self.version = nn.Parameter(torch.zeros(()))
+
+    def act(self, s, h, d):
+        return self.version.expand(s.size(0)).clone(), None, h
+
+
+def wait_for_full(collector):
+    # collector thread has filled its buffer and waits for learner to return the other one
+    start = time.perf_counter()
+    while collector.full.qsize() == 0:
+        assert time.perf_counter() - start < 10.
+        time.sleep(0.01)
+
+
+def test_pipelined_collector():
+    model = VersionModel()
+    state = (torch.zeros(2, 1), torch.zeros(2, 1), torch.ones(2, dtype=torch.bool))
+    collector = PipelinedCollector(DummyEnv(), model, 3, state)
+
+    try:
+        for n in range(4):
+            rollout, _, _ = collector.next()
+            # rollout n is collected with weights published by update n - 1, first two with initial weights
+            assert torch.all(rollout.reward == max(n - 1, 0))
+
+            # collector fills other buffer meanwhile, rollout held by learner is left untouched
+            expected = rollout.reward.clone()
+            wait_for_full(collector)
+            _, pending, _, _ = collector.full.queue[0]
+            assert pending.reward.data_ptr() != rollout.reward.data_ptr()
+            assert torch.equal(rollout.reward, expected)
+
+            with torch.no_grad():
+                model.version.fill_(n + 1)
+            collector.update(model)
+    finally:
+        collector.close()
@@ -0,0 +1,40 @@
+import torch
+
+from algo.exploration import EpsilonGreedy, Boltzmann, apex_epsilons, exponential_schedule
+
+
+def test_exponential_schedule():
+    schedule = exponential_schedule(1., 0.01, 3)
+
+    assert torch.allclose(schedule, torch.tensor([1., 0.1, 0.01]))
+
+
+def test_apex_epsilons():
+    epsilons = apex_epsilons(3, base=0.5, alpha=2.)
+
+    assert torch.allclose(epsilons, torch.tensor([0.5, 0.25, 0.125]))
+
+
+def test_epsilon_greedy():
+    action_value = torch.tensor([
+        [0., 1., 0.],
+        [2., 1., 0.],
+    ])
+
+    exploration = EpsilonGreedy(torch.tensor([0.]), 3, 2, torch.device('cpu'))
+    assert torch.equal(exploration(action_value, 0), torch.tensor([1, 0]))
+
+    # per-actor epsilons, first actor is greedy, second is random
+    exploration = EpsilonGreedy(torch.tensor([[0., 1.]]), 3, 2, torch.device('cpu'))
+    actions = torch.stack([exploration(action_value, step) for step in range(100)])
+    assert torch.all(actions[:, 0] == 1)
+    assert len(actions[:, 1].unique()) == 3
+
+
+def test_boltzmann():
+    action_value = torch.tensor([
+        [0., 10., 0.],
+    ])
+
+    exploration = Boltzmann(torch.tensor([1e-3]), 3, 1, torch.device('cpu'))
+    assert torch.equal(exploration(action_value, 0), torch.tensor([1]))
@@ -0,0 +1,50 @@
+import gym
+import torch
+from all_the_tools.config import Config as C
+from all_the_tools.metrics import Mean
+
+from algo.pg_mc import compute_loss
+from history import Rollout
+from model import Model
+
+
+def test_padded_steps_do_not_contribute_to_loss():
+    torch.manual_seed(42)
+
+    workers, horizon = 3, 5
+    state_space = gym.spaces.Box(low=-1, high=1, shape=(4,))
+    env = C(action_space=gym.spaces.Discrete(3))
+    config = C(gamma=0.9, entropy_weight=1e-2, adv_norm=True)
+    model = Model(C(encoder=C(type='fc', out_features=16), rnn=C(type='noop')), state_space, env.action_space)
+
+    # episodes of length 5, 3 and 1, steps after done are padding with zero reward, as in collect_episodes
+    mask = torch.arange(horizon).unsqueeze(0) < torch.tensor([[5], [3], [1]])
+    data = {
+        'state': torch.randn(workers, horizon, 4),
+        'hidden': model.zero_state(workers).unsqueeze(1).repeat(1, horizon, 1),
+        'done': torch.zeros(workers, horizon, dtype=torch.bool),
+        'action': torch.randint(0, 3, (workers, horizon)),
+        'reward': torch.where(mask, torch.randn(workers, horizon), torch.zeros(workers, horizon)),
+        'mask': mask,
+    }
+
+    def loss_and_gradients(data):
+        metrics = {k: Mean() for k in ['rollout/reward', 'rollout/advantage', 'rollout/entropy']}
+        model.zero_grad()
+        loss = compute_loss(env, model, Rollout(data), metrics, config)
+        loss.mean().backward()
+
+        return loss.detach(), [p.grad.clone() for p in model.parameters()]
+
+    # padded states and actions are replaced with arbitrary values
+    padded = dict(
+        data,
+        state=torch.where(mask.unsqueeze(-1), data['state'], torch.randn(workers, horizon, 4) * 100),
+        action=torch.where(mask, data['action'], torch.randint(0, 3, (workers, horizon))))
+
+    expected_loss, expected_grads = loss_and_gradients(data)
+    actual_loss, actual_grads = loss_and_gradients(padded)
+
+    assert torch.allclose(actual_loss, expected_loss, atol=1e-6)
+    for expected, actual in zip(expected_grads, actual_grads):
+        assert torch.allclose(actual, expected, atol=1e-6)
@@ -0,0 +1,80 @@
+import gym
+import torch
+from all_the_tools.config import Config as C
+
+from algo.ppo import build_sequences, optimize, shuffled_minibatches
+from history import Rollout
+from model import Model
+
+
+def test_first_minibatch_ratio_is_one_for_unchanged_model():
+    torch.manual_seed(42)
+
+    workers, horizon = 8, 4
+    state_space = gym.spaces.Box(low=0, high=8, shape=(7, 7))
+    env = C(action_space=gym.spaces.Discrete(3))
+    config = C(epochs=2, minibatches=2, adv_norm=False, clip_eps=0.2, entropy_weight=1e-2, grad_clip_norm=None)
+    # gridworld encoder has batch renorm layers, which behave differently in train and eval mode
+    model = Model(
+        C(encoder=C(type='gridworld', base_channels=4, out_features=16), rnn=C(type='noop')),
+        state_space,
+        env.action_space)
+    optimizer = torch.optim.SGD(model.parameters(), lr=1e-2)
+
+    state = torch.randint(0, 9, (workers, horizon, 7, 7))
+    hidden = model.zero_state(workers).unsqueeze(1).repeat(1, horizon, 1)
+    done = torch.zeros(workers, horizon, dtype=torch.bool)
+
+    # behaviour log-probs and values are recorded in eval mode, same as during rollout collection
+    model.eval()
+    with torch.no_grad():
+        dist, value, _ = model(state, hidden, done)
+        action = dist.sample()
+        log_prob = dist.log_prob(action)
+
+    rollout = Rollout({
+        'state': state,
+        'hidden': hidden[:, 0],
+        'done': done,
+        'action': action,
+        'reward': torch.randn(workers, horizon),
+        'log_prob': log_prob,
+        'value': value,
+        'advantage': torch.randn(workers, horizon),
+        'returns': torch.randn(workers, horizon),
+    })
+
+    _, stats = next(optimize(env, model, optimizer, rollout, config))
+    assert torch.allclose(stats['rollout/ratio'], torch.ones_like(stats['rollout/ratio']), atol=1e-5)
+
+
+def test_build_sequences():
+    workers, horizon, seq_len = 2, 6, 3
+    rollout = Rollout({
+        'state': torch.arange(workers * horizon).view(workers, horizon, 1),
+        'hidden': torch.arange(workers * horizon).view(workers, horizon, 1) * 10,
+        'reward': torch.arange(workers * horizon).view(workers, horizon).float(),
+    })
+
+    rollout = build_sequences(rollout, seq_len)
+
+    # every worker's horizon is cut into consecutive sequences, each keeping hidden state of its first step
+    assert rollout.state.size() == (workers * horizon // seq_len, seq_len, 1)
+    assert torch.equal(rollout.reward, torch.tensor([[0., 1., 2.], [3., 4., 5.], [6., 7., 8.], [9., 10., 11.]]))
+    assert torch.equal(rollout.hidden, torch.tensor([[0], [30], [60], [90]]))
+
+
+def test_shuffled_minibatches_partition_batch():
+    rollout = Rollout({
+        'state': torch.arange(10).view(10, 1),
+        'reward': torch.arange(10).view(10, 1).float(),
+    })
+
+    minibatches = list(shuffled_minibatches(rollout, 3))
+
+    assert len(minibatches) == 3
+    for minibatch in minibatches:
+        assert torch.equal(minibatch.state.float(), minibatch.reward)
+    # every sequence is used exactly once per epoch
+    state = torch.cat([minibatch.state for minibatch in minibatches])
+    assert torch.equal(state.view(-1).sort().values, torch.arange(10))
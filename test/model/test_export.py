@@ -0,0 +1,46 @@
+import gym
+import numpy as np
+import torch
+from all_the_tools.config import Config as C
+
+from model import Model
+from model.encoder import GridWorldEncoder
+from model.export import export_actor, fold_batch_renorm
+
+
+def test_fold_batch_renorm():
+    torch.manual_seed(42)
+
+    state_space = gym.spaces.Box(low=0, high=8, shape=(7, 7), dtype=np.int64)
+    encoder = GridWorldEncoder(state_space, 8, 32)
+    for module in encoder.modules():
+        if hasattr(module, 'running_std'):
+            module.running_mean.uniform_(-1, 1)
+            module.running_std.uniform_(0.5, 2)
+            module.weight.data.uniform_(0.5, 2)
+            module.bias.data.uniform_(-1, 1)
+    encoder.eval()
+
+    folded = fold_batch_renorm(encoder)
+    input = torch.randint(0, 9, (8, 7, 7))
+
+    assert torch.allclose(folded(input), encoder(input), atol=1e-5)
+
+
+def test_export_actor(tmp_path):
+    torch.manual_seed(42)
+
+    state_space = gym.spaces.Box(low=-1, high=1, shape=(4,), dtype=np.float32)
+    model = Model(
+        C(encoder=C(type='fc', out_features=8), rnn=C(type='gru')),
+        state_space,
+        gym.spaces.Discrete(3))
+    path = str(tmp_path / 'actor.pt')
+    export_actor(model, torch.randn(4, 4), path=path)
+
+    actor = torch.jit.load(path)
+    # batch size differs from the one used for tracing
+    action, h = actor.act(torch.randn(7, 4), model.zero_state(7), torch.ones(7, dtype=torch.bool))
+
+    assert action.size() == (7,)
+    assert h.size() == model.zero_state(7).size()
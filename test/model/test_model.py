@@ -0,0 +1,35 @@
+import copy
+
+import gym
+import numpy as np
+import torch
+from all_the_tools.config import Config as C
+
+from model import Model
+
+
+def test_checkpointed_encoder_updates_running_stats_once():
+    torch.manual_seed(42)
+
+    state_space = gym.spaces.Box(low=0, high=8, shape=(7, 7), dtype=np.int64)
+    action_space = gym.spaces.Discrete(3)
+    model = Model(
+        C(encoder=C(type='gridworld', base_channels=8, out_features=16), rnn=C(type='noop')),
+        state_space,
+        action_space)
+    model_checkpoint = copy.deepcopy(model)
+    model_checkpoint.checkpoint_encoder = True
+    model.train()
+    model_checkpoint.train()
+
+    input = torch.randint(0, 9, (4, 7, 7))
+    h = model.zero_state(4)
+    d = torch.ones(4, dtype=torch.bool)
+    for m in [model, model_checkpoint]:
+        dist, value, _ = m(input, h, d)
+        (dist.entropy() + value).sum().backward()
+
+    for expected, actual in zip(model.buffers(), model_checkpoint.buffers()):
+        assert torch.allclose(actual, expected)
+    for expected, actual in zip(model.parameters(), model_checkpoint.parameters()):
+        assert torch.allclose(actual.grad, expected.grad, atol=1e-6)
@@ -0,0 +1,23 @@
+import gym
+import numpy as np
+import torch
+
+from model.policy import PolicyKumaraswamy
+
+
+def test_kumaraswamy_sample():
+    torch.manual_seed(42)
+
+    action_space = gym.spaces.Box(low=np.zeros(2), high=np.ones(2))
+    policy = PolicyKumaraswamy(8, action_space)
+    # large concentrations, for which inverse cdf used to round action to exactly 0
+    with torch.no_grad():
+        policy.layers[-1].bias.fill_(30.)
+
+    input = torch.randn(256, 8)
+    action = policy.sample(input)
+    dist = policy(input)
+
+    assert action.size() == dist.sample().size()
+    assert torch.all(action > 0) and torch.all(action < 1)
+    assert torch.all(torch.isfinite(dist.log_prob(action)))
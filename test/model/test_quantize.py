@@ -0,0 +1,26 @@
+import gym
+import numpy as np
+import torch
+from all_the_tools.config import Config as C
+
+from model import Model
+from model.export import fold_batch_renorm
+from model.quantize import policy_drift
+
+
+def test_policy_drift_without_closed_form_kl():
+    torch.manual_seed(42)
+
+    state_space = gym.spaces.Box(low=-1, high=1, shape=(4,))
+    action_space = gym.spaces.Box(low=np.zeros(2), high=np.ones(2))
+    model = Model(
+        C(encoder=C(type='fc', out_features=16), rnn=C(type='noop'), continuous_policy='kumaraswamy'),
+        state_space,
+        action_space)
+    actor = fold_batch_renorm(model)
+
+    input = torch.randn(8, 4)
+    kl = policy_drift(model, actor, action_space, input, model.zero_state(8), torch.ones(8, dtype=torch.bool))
+
+    assert kl.size() == (8,)
+    assert torch.allclose(kl, torch.zeros(8), atol=1e-5)
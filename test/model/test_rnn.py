@@ -0,0 +1,24 @@
+import torch
+
+from model.rnn import RNN
+
+
+def test_rnn_segments():
+    torch.manual_seed(42)
+
+    for type in ['gru', 'lstm']:
+        rnn = RNN(type, 4, 3)
+
+        input = torch.randn(3, 6, 4)
+        hidden = torch.randn(3, rnn.zero_state(1).size(1))
+        done = torch.tensor([
+            [False, False, True, False, False, False],
+            [True, False, False, True, True, False],
+            [False, False, False, False, False, False],
+        ])
+
+        expected = rnn.rnn_loop(input, hidden, done)
+        actual = rnn.rnn_segments(input, hidden, done)
+
+        assert torch.allclose(actual[0], expected[0], atol=1e-6)
+        assert torch.allclose(actual[1], expected[1], atol=1e-6)
@@ -0,0 +1,38 @@
+import torch
+
+from history import ReplayBuffer
+
+
+def test_replay_buffer_n_step():
+    replay = ReplayBuffer(8)
+    for t, done in enumerate([False, True, False, False]):
+        replay.append(
+            state=torch.tensor([[t]]),
+            action=torch.tensor([t]),
+            reward=torch.tensor([t + 1.]),
+            done=torch.tensor([done]))
+
+    # only step 0 has state at t + 3 stored
+    batch = replay.sample(4, n=3, gamma=0.5)
+
+    assert torch.equal(batch.state, torch.tensor([[0]] * 4))
+    assert torch.allclose(batch.n_step_return, torch.tensor([1. + 0.5 * 2.] * 4))
+    assert torch.equal(batch.discount, torch.zeros(4))
+    assert torch.equal(batch.state_prime, torch.tensor([[3]] * 4))
+
+
+def test_replay_buffer_wraps():
+    replay = ReplayBuffer(2)
+    for t in range(5):
+        replay.append(
+            state=torch.tensor([[t]]),
+            action=torch.tensor([t]),
+            reward=torch.tensor([1.]),
+            done=torch.tensor([False]))
+
+    batch = replay.sample(4, n=1, gamma=0.5)
+
+    assert len(replay) == 2
+    assert torch.equal(batch.state, torch.tensor([[3]] * 4))
+    assert torch.equal(batch.discount, torch.full((4,), 0.5))
+    assert torch.equal(batch.state_prime, torch.tensor([[4]] * 4))
@@ -0,0 +1,41 @@
+import threading
+
+import gym
+import torch
+from all_the_tools.config import Config as C
+
+from inference_server import InferenceServer, serve
+from model import Model
+from weight_store import WeightStore
+
+
+def test_inference_server():
+    torch.manual_seed(42)
+
+    config = C(model=C(encoder=C(type='fc', out_features=8), rnn=C(type='gru')))
+    observation_space = gym.spaces.Box(low=-1, high=1, shape=(4,))
+    action_space = gym.spaces.Discrete(3)
+    model = Model(config.model, observation_space, action_space)
+    model.eval()
+
+    server = InferenceServer(model, observation_space, action_space, clients=2, slots=1, max_batch=1, max_latency=0.)
+    store = WeightStore(model, readers=1)
+    thread = threading.Thread(target=serve, args=(server, config, store, torch.device('cpu')))
+    thread.start()
+
+    state = torch.randn(1, 4)
+    done = torch.ones(1, dtype=torch.bool)
+    action, log_prob = server.client(1).act(state, done)
+
+    server.stop_event.set()
+    thread.join()
+    assert server.stopped.is_set()
+
+    with torch.no_grad():
+        dist, _, hidden = model(state, model.zero_state(1), done)
+
+    assert action.size() == (1,)
+    assert torch.allclose(log_prob, dist.log_prob(action))
+    # only rows of client 1 are written
+    assert torch.allclose(server.client(1).hidden(), hidden)
+    assert torch.equal(server.client(0).hidden(), model.zero_state(1))
@@ -0,0 +1,9 @@
+import pytest
+from all_the_tools.config import Config as C
+
+from transforms import apply_transforms
+
+
+def test_batch_transforms_come_last():
+    with pytest.raises(AssertionError):
+        apply_transforms(None, [C(type='batch_grayscale'), C(type='stack', k=4, dim=0)])
@@ -76,3 +76,51 @@ def test_generalized_advantage_estimation():
     expected = torch.tensor([[0.6064, -1.38, -4., 3.40576, 2.508, 1.4]])
 
     assert torch.allclose(actual, expected)
+
+
+def test_vtrace_on_policy():
+    rewards = torch.tensor([[1., 2., 3., 4.]])
+    values = torch.tensor([[0.5, 1., 1.5, 2.]])
+    value_prime = torch.tensor([5.])
+    dones = torch.tensor([[False, True, False, False]])
+
+    vs, advantages = utils.vtrace(torch.zeros_like(rewards), rewards, values, value_prime, dones, gamma=0.9)
+    returns = utils.n_step_discounted_return(rewards, value_prime, dones, gamma=0.9)
+
+    assert torch.allclose(vs, returns)
+
+
+def test_vtrace():
+    log_ratios = torch.log(torch.tensor([[0.5, 0.5, 0.5, 2., 2., 2.]]))
+    rewards = torch.tensor([[5., 5., 5., 5., 5., 5.]])
+    values = torch.tensor([[10., 10., 10., 10., 10., 10.]])
+    value_prime = torch.tensor([100.])
+    dones = torch.tensor([[False, False, True, False, False, True]])
+
+    vs, advantages = utils.vtrace(log_ratios, rewards, values, value_prime, dones, gamma=0.9)
+
+    expected_vs = torch.tensor([[
+        10. + 0.5 * (5. + 0.9 * 10. - 10.) + 0.9 * 0.5 * (0.5 * (5. + 0.9 * 10. - 10.) + 0.9 * 0.5 * 0.5 * -5.),
+        10. + 0.5 * (5. + 0.9 * 10. - 10.) + 0.9 * 0.5 * 0.5 * -5.,
+        10. + 0.5 * -5.,
+        10. + (5. + 0.9 * 10. - 10.) + 0.9 * ((5. + 0.9 * 10. - 10.) + 0.9 * -5.),
+        10. + (5. + 0.9 * 10. - 10.) + 0.9 * -5.,
+        10. + -5.,
+    ]])
+    vs_prime = torch.cat([expected_vs[:, 1:], value_prime.unsqueeze(1)], 1)
+    masks = (~dones).float()
+    expected_advantages = torch.tensor([[0.5, 0.5, 0.5, 1., 1., 1.]]) * (rewards + masks * 0.9 * vs_prime - values)
+
+    assert torch.allclose(vs, expected_vs)
+    assert torch.allclose(advantages, expected_advantages)
+
+
+def test_normalize_with_mask():
+    input = torch.tensor([[1., 2., 3., 100.], [4., 5., -100., -100.]])
+    mask = torch.tensor([[True, True, True, False], [True, True, False, False]])
+    actual = utils.normalize(input, mask)
+
+    # padded elements are neither used for statistics nor normalized
+    valid = torch.tensor([1., 2., 3., 4., 5.])
+    assert torch.allclose(actual[mask], (valid - valid.mean()) / valid.std())
+    assert torch.equal(actual[~mask], input[~mask])
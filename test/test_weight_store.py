@@ -0,0 +1,45 @@
+import threading
+
+import torch
+import torch.nn as nn
+
+from weight_store import WeightStore
+
+
+def test_weight_store():
+    learner = nn.Linear(3, 2)
+    actor = nn.Linear(3, 2)
+    store = WeightStore(learner, readers=2)
+
+    version = store.pull(actor, 0)
+    assert torch.equal(actor.weight, learner.weight)
+    assert store.lag() == [0, 0]
+
+    with torch.no_grad():
+        learner.weight.add_(1.)
+    store.publish(learner)
+    store.publish(learner)
+    assert store.lag() == [2, 2]
+
+    version = store.pull(actor, 0, version)
+    assert torch.equal(actor.weight, learner.weight)
+    assert store.lag() == [0, 2]
+
+    # no new version, weights are not copied
+    with torch.no_grad():
+        actor.weight.zero_()
+    assert store.pull(actor, 0, version) == version
+    assert torch.all(actor.weight == 0)
+
+
+def test_weight_store_retries_during_publish():
+    learner = nn.Linear(3, 2)
+    actor = nn.Linear(3, 2)
+    store = WeightStore(learner, readers=1)
+
+    # learner is in the middle of publish, reader retries until write finishes
+    store.version.value += 1
+    timer = threading.Timer(0.1, lambda: setattr(store.version, 'value', store.version.value + 1))
+    timer.start()
+    assert store.pull(actor, 0) == 2
+    timer.join()
@@ -0,0 +1,57 @@
+import gym
+import numpy as np
+import torch
+
+from wrappers.batch_stack_obs import BatchStackObs
+
+
+class DummyEnv(gym.Env):
+    observation_space = gym.spaces.Box(low=0, high=255, shape=(1,), dtype=np.uint8)
+    action_space = gym.spaces.Discrete(3)
+
+    def __init__(self):
+        self.i = None
+
+    def reset(self):
+        self.i = torch.zeros(2, dtype=torch.long)
+
+        return self.i.unsqueeze(1)
+
+    def step(self, action):
+        self.i += 1
+        done = self.i == torch.tensor([2, 3])
+        self.i[done] = 0
+
+        return self.i.unsqueeze(1), torch.zeros(2), done, [None, None]
+
+
+def test_batch_stack_obs():
+    env = BatchStackObs(DummyEnv(), k=3, dim=0)
+    assert env.observation_space.shape == (3, 1)
+
+    obs = env.reset()
+    assert torch.equal(
+        obs,
+        torch.tensor([[[0], [0], [0]], [[0], [0], [0]]]))
+
+    prev = obs
+    obs, _, done, _ = env.step(None)
+    assert torch.equal(done, torch.tensor([False, False]))
+    assert torch.equal(
+        obs,
+        torch.tensor([[[0], [0], [1]], [[0], [0], [1]]]))
+    assert torch.equal(
+        prev,
+        torch.tensor([[[0], [0], [0]], [[0], [0], [0]]]))
+
+    obs, _, done, _ = env.step(None)
+    assert torch.equal(done, torch.tensor([True, False]))
+    assert torch.equal(
+        obs,
+        torch.tensor([[[0], [0], [0]], [[0], [1], [2]]]))
+
+    obs, _, done, _ = env.step(None)
+    assert torch.equal(done, torch.tensor([False, True]))
+    assert torch.equal(
+        obs,
+        torch.tensor([[[0], [0], [1]], [[0], [0], [0]]]))
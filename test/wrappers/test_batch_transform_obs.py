@@ -0,0 +1,44 @@
+import gym
+import numpy as np
+import pytest
+import torch
+
+from wrappers.batch_transform_obs import BatchGrayScaleObs, BatchResizeObs
+
+# opencv is an optional dependency, only used as reference implementation here
+cv2 = pytest.importorskip('cv2')
+
+
+class DummyEnv(gym.Env):
+    observation_space = gym.spaces.Box(low=0, high=255, shape=(12, 16, 3), dtype=np.uint8)
+    action_space = gym.spaces.Discrete(3)
+
+    def __init__(self):
+        self.obs = torch.from_numpy(np.random.RandomState(42).randint(0, 256, (2, 12, 16, 3), dtype=np.uint8))
+
+    def reset(self):
+        return self.obs
+
+
+def test_batch_grayscale_obs():
+    env = BatchGrayScaleObs(DummyEnv())
+    assert env.observation_space.shape == (12, 16)
+
+    obs = env.reset()
+    expected = np.stack([cv2.cvtColor(o, cv2.COLOR_RGB2GRAY) for o in env.env.obs.numpy()])
+
+    assert obs.dtype == torch.uint8
+    assert np.abs(obs.numpy().astype(np.int64) - expected).max() <= 1
+
+
+def test_batch_resize_obs():
+    for size in [(8, 6), (20, 15)]:
+        env = BatchResizeObs(DummyEnv(), size=size)
+        assert env.observation_space.shape == (size[1], size[0], 3)
+
+        obs = env.reset()
+        expected = np.stack([cv2.resize(o, size) for o in env.env.obs.numpy()])
+
+        assert obs.dtype == torch.uint8
+        assert obs.shape == expected.shape
+        assert np.abs(obs.numpy().astype(np.int64) - expected).max() <= 1
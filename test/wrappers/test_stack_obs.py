@@ -0,0 +1,69 @@
+import gym
+import numpy as np
+
+from wrappers.stack_obs import StackObs
+
+
+class DummyEnv(gym.Env):
+    observation_space = gym.spaces.Box(low=0, high=255, shape=(2,), dtype=np.uint8)
+    action_space = gym.spaces.Discrete(3)
+
+    def __init__(self):
+        self.i = None
+
+    def reset(self):
+        self.i = 0
+
+        return np.full(2, self.i, dtype=np.uint8)
+
+    def step(self, action):
+        self.i += 1
+
+        return np.full(2, self.i, dtype=np.uint8), 0., self.i % 5 == 0, None
+
+
+def test_stack_obs():
+    env = StackObs(DummyEnv(), k=3, dim=0)
+    assert env.observation_space.shape == (3, 2)
+
+    obs = env.reset()
+    assert np.array_equal(
+        obs,
+        np.array([[0, 0], [0, 0], [0, 0]]))
+
+    for i in range(1, 10):
+        obs, _, _, _ = env.step(env.action_space.sample())
+        expected = np.maximum(np.arange(i - 2, i + 1), 0)
+        assert np.array_equal(
+            obs,
+            np.stack([expected, expected], 1))
+
+
+def test_stack_obs_last_dim():
+    env = StackObs(DummyEnv(), k=2, dim=-1)
+    assert env.observation_space.shape == (2, 2)
+
+    env.reset()
+    env.step(env.action_space.sample())
+    obs, _, _, _ = env.step(env.action_space.sample())
+    assert np.array_equal(
+        obs,
+        np.array([[1, 2], [1, 2]]))
+
+
+def test_stack_obs_reset():
+    env = StackObs(DummyEnv(), k=3, dim=0)
+
+    env.reset()
+    env.step(env.action_space.sample())
+    env.step(env.action_space.sample())
+
+    obs = env.reset()
+    assert np.array_equal(
+        obs,
+        np.zeros((3, 2)))
+
+    obs, _, _, _ = env.step(env.action_space.sample())
+    assert np.array_equal(
+        obs,
+        np.array([[0, 0], [0, 0], [1, 1]]))
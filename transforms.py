@@ -1,6 +1,5 @@
 from functools import partial
 
-import cv2
 import gym.wrappers
 import numba
 import numpy as np
@@ -14,7 +13,8 @@ def permute(input):
     return input
 
 
-@numba.njit()
+# cached on disk, so env workers load compiled code instead of recompiling it on startup
+@numba.njit(cache=True)
 def normalize(input):
     input = input.astype(np.float32)
     input -= 255 / 2
@@ -24,6 +24,10 @@ def normalize(input):
 
 
 def resize(input, size):
+    # imported lazily, so only envs with resize transform pay for cv2 import. algo scripts import it once
+    # in the main process (see algo.common.import_plugins), so forked workers find it already loaded
+    import cv2
+
     if isinstance(size, int):
         size = (size, size)
     input = cv2.resize(input, size)
@@ -31,9 +35,23 @@ def resize(input, size):
     return input
 
 
+# applied to the whole batch in the main process by apply_batch_transforms, after all worker-side transforms
+BATCH_TRANSFORMS = [
+    'batch_grayscale',
+    'batch_resize',
+    'batch_stack',
+]
+
+
 def apply_transforms(env, transforms):
+    # batch transforms always run after worker-side ones, so they can only be listed at the end
+    batch = [transform.type in BATCH_TRANSFORMS for transform in transforms]
+    assert batch == sorted(batch), 'batch transforms should come after all worker-side transforms'
+
     for transform in transforms:
-        if transform.type == 'adj_max':
+        if transform.type in BATCH_TRANSFORMS:
+            continue
+        elif transform.type == 'adj_max':
             env = wrappers.AdjMax(env)
         elif transform.type == 'time_limit':
             env = gym.wrappers.TimeLimit(env, transform.t)
@@ -55,3 +73,19 @@ def apply_transforms(env, transforms):
             raise AssertionError('invalid transform.type {}'.format(transform.type))
 
     return env
+
+
+def apply_batch_transforms(env, transforms):
+    for transform in transforms:
+        if transform.type not in BATCH_TRANSFORMS:
+            continue
+        elif transform.type == 'batch_grayscale':
+            env = wrappers.BatchGrayScaleObs(env)
+        elif transform.type == 'batch_resize':
+            env = wrappers.BatchResizeObs(env, size=transform.size)
+        elif transform.type == 'batch_stack':
+            env = wrappers.BatchStackObs(env, k=transform.k, dim=transform.dim)
+        else:
+            raise AssertionError('invalid transform.type {}'.format(transform.type))
+
+    return env
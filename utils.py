@@ -39,7 +39,7 @@ def generalized_advantage_estimation(rewards, values, value_prime, dones, gamma,
     td_error = rewards + masks * gamma * values_prime - values
     gaes = torch.zeros_like(rewards)
 
-    gae = torch.zeros(rewards.size(0))
+    gae = torch.zeros_like(rewards[:, 0])
     for t in reversed(range(rewards.size(1))):
         gae = td_error[:, t] + masks[:, t] * gamma * lam * gae
         gaes[:, t] = gae
@@ -47,6 +47,29 @@ def generalized_advantage_estimation(rewards, values, value_prime, dones, gamma,
     return gaes
 
 
+def vtrace(log_ratios, rewards, values, value_prime, dones, gamma, max_rho=1., max_c=1.):
+    # off-policy corrected value targets and policy gradient advantages from IMPALA paper,
+    # log_ratios are log(target_policy / behaviour_policy) of taken actions
+    ratios = log_ratios.exp()
+    rhos = ratios.clamp(max=max_rho)
+    cs = ratios.clamp(max=max_c)
+    masks = (~dones).float()
+    values_prime = torch.cat([values[:, 1:], value_prime.unsqueeze(1)], 1)
+    td_error = rhos * (rewards + masks * gamma * values_prime - values)
+    vs_minus_values = torch.zeros_like(values)
+
+    acc = torch.zeros_like(value_prime)
+    for t in reversed(range(rewards.size(1))):
+        acc = td_error[:, t] + masks[:, t] * gamma * cs[:, t] * acc
+        vs_minus_values[:, t] = acc
+
+    vs = values + vs_minus_values
+    vs_prime = torch.cat([vs[:, 1:], value_prime.unsqueeze(1)], 1)
+    advantages = rhos * (rewards + masks * gamma * vs_prime - values)
+
+    return vs, advantages
+
+
 # def generalized_advantage_estimation(rewards, values, value_prime, dones, gamma, lam):
 #     masks = (~dones).float()
 #     values_prime = torch.cat([values[:, 1:], value_prime.unsqueeze(1)], 1)
@@ -64,5 +87,11 @@ def generalized_advantage_estimation(rewards, values, value_prime, dones, gamma,
 #     return gaes
 
 
-def normalize(input):
-    return (input - input.mean()) / input.std()
+def normalize(input, mask=None):
+    if mask is None:
+        return (input - input.mean()) / input.std()
+
+    # statistics are estimated over valid (unpadded) elements only
+    valid = input[mask]
+
+    return torch.where(mask, (input - valid.mean()) / valid.std(), input)
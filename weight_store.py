@@ -0,0 +1,55 @@
+import time
+
+import torch
+import torch.multiprocessing as mp
+
+
+class WeightStore(object):
+    # policy weights in shared memory with version counter, written by learner and read by actor processes.
+    # version is odd while learner writes, so readers retry instead of picking up partially written weights
+    def __init__(self, model, readers):
+        state = model.state_dict()
+
+        self.keys = list(state.keys())
+        self.tensors = [state[k].detach().cpu().clone().share_memory_() for k in self.keys]
+        self.version = mp.Value('l', 0)
+        self.reader_versions = mp.Array('l', readers)
+
+    def publish(self, model):
+        state = model.state_dict()
+
+        # lock is held only around counter updates, readers are not blocked during copy and see odd version instead
+        with self.version.get_lock():
+            self.version.value += 1
+        with torch.no_grad():
+            for k, tensor in zip(self.keys, self.tensors):
+                tensor.copy_(state[k])
+        with self.version.get_lock():
+            self.version.value += 1
+
+    def pull(self, model, rank, version=None):
+        # copies weights into model if newer version was published, returns version model holds afterwards
+        state = model.state_dict()
+
+        while True:
+            latest = self.version.value
+            if latest == version:
+                return version
+            if latest % 2 == 1:
+                # yield to learner instead of spinning on a core it may need to finish the write
+                time.sleep(0)
+                continue
+
+            with torch.no_grad():
+                for k, tensor in zip(self.keys, self.tensors):
+                    state[k].copy_(tensor)
+
+            if self.version.value == latest:
+                self.reader_versions[rank] = latest
+                return latest
+
+    def lag(self):
+        # number of updates every reader is behind learner
+        latest = self.version.value
+
+        return [(latest - version) // 2 for version in self.reader_versions]
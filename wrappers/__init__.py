@@ -1,5 +1,7 @@
 from wrappers.adj_max import AdjMax
 from wrappers.batch import Batch
+from wrappers.batch_stack_obs import BatchStackObs
+from wrappers.batch_transform_obs import BatchGrayScaleObs, BatchResizeObs
 from wrappers.grid_world import GridWorld
 from wrappers.multi_agent import MultiAgent
 from wrappers.skip_obs import SkipObs
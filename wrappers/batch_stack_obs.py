@@ -0,0 +1,56 @@
+import gym
+import numpy as np
+import torch
+
+
+class BatchStackObs(gym.Wrapper):
+    def __init__(self, env, k, dim=-1):
+        super().__init__(env)
+
+        self.k = k
+        self.dim = dim
+        self.buffer = None
+        self.position = None
+        self.observation_space = gym.spaces.Box(
+            low=np.repeat(np.expand_dims(self.observation_space.low, self.dim), self.k, self.dim),
+            high=np.repeat(np.expand_dims(self.observation_space.high, self.dim), self.k, self.dim),
+            dtype=self.observation_space.dtype)
+
+    def reset(self, **kwargs):
+        obs = self.env.reset(**kwargs)
+
+        # buffer holds 2 * k frames of every worker on obs device, so last k frames are always a contiguous slice
+        size = (obs.size(0), self.k * 2, *obs.size()[1:])
+        if self.buffer is None or self.buffer.size() != size or self.buffer.dtype != obs.dtype or \
+                self.buffer.device != obs.device:
+            self.buffer = torch.empty(size, dtype=obs.dtype, device=obs.device)
+
+        # new episode starts with initial observation repeated k times
+        self.buffer[:, :self.k] = obs.unsqueeze(1)
+        self.position = self.k
+
+        return self.observation()
+
+    def step(self, action):
+        obs, reward, done, info = self.env.step(action)
+
+        if self.position == self.buffer.size(1):
+            self.buffer[:, :self.k - 1] = self.buffer[:, self.position - self.k + 1:self.position]
+            self.position = self.k - 1
+
+        self.buffer[:, self.position] = obs
+        self.position += 1
+
+        # workers reset finished envs, so obs of a done row is the first frame of the next episode,
+        # only frames of done rows are overwritten
+        self.buffer[done, self.position - self.k:self.position] = obs[done].unsqueeze(1)
+
+        return self.observation(), reward, done, info
+
+    def observation(self):
+        dim = self.dim + 1 if self.dim >= 0 else self.dim
+        obs = self.buffer[:, self.position - self.k:self.position]
+        obs = obs.movedim(1, dim)
+
+        # single copy per step, since rollout history keeps references to past states while buffer is reused
+        return obs.clone(memory_format=torch.contiguous_format)
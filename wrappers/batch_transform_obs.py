@@ -0,0 +1,56 @@
+import gym
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+
+class BatchGrayScaleObs(gym.ObservationWrapper):
+    def __init__(self, env):
+        super().__init__(env)
+
+        assert self.observation_space.shape[-1] == 3
+
+        self.observation_space = gym.spaces.Box(
+            low=0, high=255, shape=self.observation_space.shape[:-1], dtype=np.uint8)
+        # same weights as cv2.COLOR_RGB2GRAY, used by gym.wrappers.GrayScaleObservation
+        self.weight = torch.tensor([0.299, 0.587, 0.114])
+
+    def observation(self, obs):
+        if self.weight.device != obs.device:
+            self.weight = self.weight.to(obs.device)
+
+        obs = torch.matmul(obs.float(), self.weight)
+        obs = obs.round_().clamp_(0, 255).to(torch.uint8)
+
+        return obs
+
+
+class BatchResizeObs(gym.ObservationWrapper):
+    def __init__(self, env, size):
+        super().__init__(env)
+
+        # size follows cv2.resize convention of (width, height)
+        if isinstance(size, int):
+            size = (size, size)
+        self.size = (size[1], size[0])
+
+        space = self.observation_space
+        shape = (*self.size, *space.shape[2:])
+        self.observation_space = gym.spaces.Box(
+            low=space.low.min(), high=space.high.max(), shape=shape, dtype=space.dtype)
+
+    def observation(self, obs):
+        dtype = obs.dtype
+
+        # [b, h, w, ...] -> [b, c, h, w]
+        b, h, w = obs.size()[:3]
+        rest = obs.size()[3:]
+        obs = obs.reshape(b, h, w, -1).permute(0, 3, 1, 2).float()
+        obs = F.interpolate(obs, size=self.size, mode='bilinear', align_corners=False)
+        obs = obs.permute(0, 2, 3, 1).reshape(b, *self.size, *rest)
+
+        if dtype == torch.uint8:
+            obs = obs.round_().clamp_(0, 255)
+        obs = obs.to(dtype)
+
+        return obs
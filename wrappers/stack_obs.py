@@ -2,9 +2,6 @@ import gym
 import numpy as np
 
 
-# TODO: handle episode end
-
-
 class StackObs(gym.Wrapper):
     def __init__(self, env, k, dim=-1):
         super().__init__(env)
@@ -12,31 +9,41 @@ class StackObs(gym.Wrapper):
         self.k = k
         self.dim = dim
         self.buffer = None
+        self.position = None
         self.observation_space = gym.spaces.Box(
-            low=np.expand_dims(self.observation_space.low, -1).repeat(self.k, -1),
-            high=np.expand_dims(self.observation_space.high, -1).repeat(self.k, -1),
+            low=np.repeat(np.expand_dims(self.observation_space.low, self.dim), self.k, self.dim),
+            high=np.repeat(np.expand_dims(self.observation_space.high, self.dim), self.k, self.dim),
             dtype=self.observation_space.dtype)
 
     def reset(self, **kwargs):
-        self.buffer = []
+        obs = self.env.reset(**kwargs)
+        obs = np.asarray(obs)
 
-        obs = self.env.reset()
-        self.buffer.append(obs)
+        # buffer holds 2 * k frames, so last k frames are always a contiguous slice
+        if self.buffer is None or self.buffer.shape[1:] != obs.shape or self.buffer.dtype != obs.dtype:
+            self.buffer = np.empty((self.k * 2, *obs.shape), dtype=obs.dtype)
 
-        while len(self.buffer) < self.k:
-            obs, reward, done, meta = self.env.step(self.action_space.sample())
-            assert not done
-            self.buffer.append(obs)
-           
-        obs = np.stack(self.buffer, self.dim)
+        # new episode starts with initial observation repeated k times
+        self.buffer[:self.k] = obs
+        self.position = self.k
 
-        return obs
+        return self.observation()
 
     def step(self, action):
         obs, reward, done, info = self.env.step(action)
-        self.buffer.append(obs)
-        self.buffer = self.buffer[-self.k:]
 
-        obs = np.stack(self.buffer, self.dim)
+        if self.position == self.buffer.shape[0]:
+            self.buffer[:self.k - 1] = self.buffer[self.position - self.k + 1:self.position]
+            self.position = self.k - 1
+
+        self.buffer[self.position] = obs
+        self.position += 1
 
-        return obs, reward, done, info
+        return self.observation(), reward, done, info
+
+    def observation(self):
+        # returned observation is a view into the buffer and is only valid until the next call to step
+        obs = self.buffer[self.position - self.k:self.position]
+        obs = np.moveaxis(obs, 0, self.dim)
+
+        return obs